@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING
 from importlib.metadata import entry_points
 from urllib.parse import urlparse
 
-from typing import Any
+from typing import Any, Optional
 
 from weakref import ProxyType
 
@@ -13,6 +13,9 @@ if TYPE_CHECKING:
 
 BUFFER_REGISTRY: dict[str, type] = {}
 
+# Sorted result of list_buffer_schemes(), reset whenever a scheme is registered
+_SCHEMES_CACHE: Optional[list[str]] = None
+
 def register_buffer(
         *schemes: str,
     ):
@@ -23,6 +26,8 @@ def register_buffer(
         class LineBuffer: ...
     """
     def decorator(cls_or_factory):
+        global _SCHEMES_CACHE
+        _SCHEMES_CACHE = None
         for scheme in schemes:
             lower = scheme.lower()
             if lower in BUFFER_REGISTRY:
@@ -36,9 +41,14 @@ def list_buffer_schemes() -> list[str]:
     Returns a dictionary of all registered buffers.
     The keys are the URI schemes, and the values are the interface classes.
     """
-    eps = entry_points().select(group="sioba.buffer")
-    schemes = set([ep.name.lower() for ep in eps]) | set(BUFFER_REGISTRY.keys())
-    return list(sorted(schemes))
+    global _SCHEMES_CACHE
+    # Scanning the installed entry points is slow and they don't change
+    # while we're running, so only redo it after a new registration
+    if _SCHEMES_CACHE is None:
+        eps = entry_points().select(group="sioba.buffer")
+        schemes = set([ep.name.lower() for ep in eps]) | set(BUFFER_REGISTRY.keys())
+        _SCHEMES_CACHE = sorted(schemes)
+    return list(_SCHEMES_CACHE)
 
 def buffer_from_uri(uri: str, **kwargs):
 
@@ -10,6 +10,88 @@ from typing import Any
 # Screen Persistence via pytE
 ###########################################################
 
+# SGR parameters keyed by the colour names pyte stores on each character.
+# Disable pylance error since pyte.graphics doesn't actually exist during
+# static analysis
+FG_SGR: dict[str, str] = {
+    color: str(code) for code, color in pyte.graphics.FG_ANSI.items() # type: ignore
+}
+BG_SGR: dict[str, str] = {
+    color: str(code) for code, color in pyte.graphics.BG_ANSI.items() # type: ignore
+}
+
+# Styles are tuples in pyte's Char field order minus the data, ie.
+# (fg, bg, bold, italics, underscore, strikethrough, reverse, blink)
+DEFAULT_STYLE = ("default", "default", False, False, False, False, False, False)
+
+# An empty cell as far as the frontend is concerned
+BLANK_CHAR = (" ", *DEFAULT_STYLE)
+
+def get_attribute_changes(state: tuple, style: tuple) -> tuple[str, tuple]:
+    """ Determine which attributes need to change to go from the `state`
+        style to `style`. Returns the SGR escape sequence (empty if nothing
+        changed) along with the new state.
+    """
+    fg, bg, bold, italics, underscore, strikethrough, reverse, blink = style
+    (cur_fg, cur_bg, cur_bold, cur_italics, cur_underscore,
+        cur_strikethrough, cur_reverse, cur_blink) = state
+
+    needed_attrs = []
+
+    # Check if we need to reset everything
+    if (cur_bold and not bold or
+        cur_italics and not italics or
+        cur_underscore and not underscore or
+        cur_blink and not blink or
+        cur_reverse and not reverse or
+        cur_strikethrough and not strikethrough or
+        cur_fg != fg or
+        cur_bg != bg):
+        needed_attrs.append('0')
+        (cur_fg, cur_bg, cur_bold, cur_italics, cur_underscore,
+            cur_strikethrough, cur_reverse, cur_blink) = DEFAULT_STYLE
+
+    # Add needed attributes
+    if bold and not cur_bold:
+        needed_attrs.append('1')
+        cur_bold = True
+
+    if italics and not cur_italics:
+        needed_attrs.append('3')
+        cur_italics = True
+
+    if underscore and not cur_underscore:
+        needed_attrs.append('4')
+        cur_underscore = True
+
+    if blink and not cur_blink:
+        needed_attrs.append('5')
+        cur_blink = True
+
+    if reverse and not cur_reverse:
+        needed_attrs.append('7')
+        cur_reverse = True
+
+    if strikethrough and not cur_strikethrough:
+        needed_attrs.append('9')
+        cur_strikethrough = True
+
+    # Handle colors only if they've changed
+    if fg != cur_fg and (code := FG_SGR.get(fg)) is not None:
+        needed_attrs.append(code)
+        cur_fg = fg
+
+    if bg != cur_bg and (code := BG_SGR.get(bg)) is not None:
+        needed_attrs.append(code)
+        cur_bg = bg
+
+    state = (cur_fg, cur_bg, cur_bold, cur_italics, cur_underscore,
+                cur_strikethrough, cur_reverse, cur_blink)
+
+    if needed_attrs:
+        return f"\033[{';'.join(needed_attrs)}m", state
+    return "", state
+
 class EventsCursor(Cursor):
     """ Custom cursor class to handle cursor events. """
 
@@ -113,131 +195,58 @@ class EventsScreen(pyte.Screen):
 
     def dump_screen_state(self, screen: pyte.Screen) -> bytes:
         """Dumps current screen state to an ANSI file with efficient style management"""
-        buf = "\033[0m"  # Initial reset
-
-        # Track current attributes
-        current_state = {
-            'bold': False,
-            'italics': False,
-            'underscore': False,
-            'blink': False,
-            'reverse': False,
-            'strikethrough': False,
-            'fg': 'default',
-            'bg': 'default'
-        }
-
-        def get_attribute_changes(char, current_state):
-            """Determine which attributes need to change"""
-            needed_attrs = []
-            needs_reset = False
-
-            # Check if we need to reset everything
-            if (current_state['bold'] and not char.bold or
-                current_state['italics'] and not char.italics or
-                current_state['underscore'] and not char.underscore or
-                current_state['blink'] and not char.blink or
-                current_state['reverse'] and not char.reverse or
-                current_state['strikethrough'] and not char.strikethrough or
-                current_state['fg'] != char.fg or
-                current_state['bg'] != char.bg):
-                needs_reset = True
-
-            if needs_reset:
-                needed_attrs.append('0')
-                # Reset our tracking state
-                for key in current_state:
-                    current_state[key] = False
-                current_state['fg'] = 'default'
-                current_state['bg'] = 'default'
-
-            # Add needed attributes
-            if char.bold and (needs_reset or not current_state['bold']):
-                needed_attrs.append('1')
-                current_state['bold'] = True
-
-            if char.italics and (needs_reset or not current_state['italics']):
-                needed_attrs.append('3')
-                current_state['italics'] = True
-
-            if char.underscore and (needs_reset or not current_state['underscore']):
-                needed_attrs.append('4')
-                current_state['underscore'] = True
-
-            if char.blink and (needs_reset or not current_state['blink']):
-                needed_attrs.append('5')
-                current_state['blink'] = True
-
-            if char.reverse and (needs_reset or not current_state['reverse']):
-                needed_attrs.append('7')
-                current_state['reverse'] = True
-
-            if char.strikethrough and (needs_reset or not current_state['strikethrough']):
-                needed_attrs.append('9')
-                current_state['strikethrough'] = True
-
-            # Handle colors only if they've changed
-            if char.fg != current_state['fg']:
-                # Disable pylance error since pyte.graphics doesn't actually
-                # exist during static analysis
-                for code, color in pyte.graphics.FG_ANSI.items(): # type: ignore
-                    if color == char.fg:
-                        needed_attrs.append(str(code))
-                        current_state['fg'] = char.fg
-                        break
-
-            if char.bg != current_state['bg']:
-                # Disable pylance error since pyte.graphics doesn't actually
-                # exist during static analysis
-                for code, color in pyte.graphics.BG_ANSI.items(): # type: ignore
-                    if color == char.bg:
-                        needed_attrs.append(str(code))
-                        current_state['bg'] = char.bg
-                        break
-
-            return needed_attrs
+        parts = ["\033[0m"]  # Initial reset
 
-        # Process scrollback buffer so we can have the history
-        # Disable pylance error since pyte.graphics doesn't actually exist during
-        # static analysis
-        for y, line in enumerate(screen.scrollback_buffer): # type: ignore
-            buf += "\n"
-            for x, char in line.items():
-                attrs = get_attribute_changes(char, current_state)
+        # A screen only tends to use a handful of styles so the escape
+        # sequence for each (current style, next style) pair is memoized
+        transitions: dict[tuple, tuple[str, tuple]] = {}
+
+        def dump_chars(chars, state: tuple) -> tuple:
+            for char in chars:
+                style = char[1:]
+                change = transitions.get((state, style))
+                if change is None:
+                    change = get_attribute_changes(state, style)
+                    transitions[(state, style)] = change
+                sgr, state = change
 
                 # Write attributes if any changed
-                if attrs:
-                    buf += f"\033[{';'.join(attrs)}m"
+                if sgr:
+                    parts.append(sgr)
 
                 # Write the character
-                buf += char.data
+                parts.append(char.data)
+            return state
+
+        # Process scrollback buffer so we can have the history
+        # Disable pylance error since pyte.graphics doesn't actually exist during
+        # static analysis
+        state = DEFAULT_STYLE
+        for line in screen.scrollback_buffer: # type: ignore
+            parts.append("\n")
+            state = dump_chars(line.values(), state)
 
         # Process screen contents
         for y in range(screen.lines):
-            buf += "\n"  # Position cursor at start of line
-
-            for x in range(screen.columns):
-                char = screen.buffer[y][x]
-                attrs = get_attribute_changes(char, current_state)
+            parts.append("\n")  # Position cursor at start of line
+
+            # Skip the trailing blank cells, the frontend's cleared cells
+            # look identical so there's no need to send them
+            line = screen.buffer[y]
+            last = screen.columns - 1
+            while last >= 0 and line[last] == BLANK_CHAR:
+                last -= 1
+            # The cut off cells would have switched back to the default
+            # style, so do that explicitly if the line ended styled
+            if dump_chars([line[x] for x in range(last + 1)], state) != DEFAULT_STYLE:
+                parts.append("\033[0m")
 
-                # Write attributes if any changed
-                if attrs:
-                    buf += f"\033[{';'.join(attrs)}m"
-
-                # Write the character
-                buf += char.data
-
-            # Reset attributes at end of each line
-            #buf += "\033[0m"
             # Reset our tracking state at end of line
-            for key in current_state:
-                current_state[key] = False
-            current_state['fg'] = 'default'
-            current_state['bg'] = 'default'
+            state = DEFAULT_STYLE
 
         # Reset cursor position at the end
-        buf += f"\033[{screen.lines};1H"
-        return buf.encode()
+        parts.append(f"\033[{screen.lines};1H")
+        return "".join(parts).encode()
 
     def reset(self) -> None:
         """ Reset the screen to its initial state. """
@@ -1,6 +1,9 @@
+import sys
 import types
 from typing import (
     Any,
+    Callable,
+    NamedTuple,
     Union,
     get_origin,
     get_args,
@@ -10,10 +13,12 @@ from dataclasses import (
     dataclass,
     field,
     fields,
-    asdict,
 )
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qsl, unquote_plus
+from functools import lru_cache
+from collections import OrderedDict
 from collections.abc import (
+    Iterator,
     Sequence,
 )
 
@@ -47,91 +52,232 @@ Unset = UnsetType()
 
 UnsetFactory = lambda *a, **kw: field(*a, default_factory=UnsetType, **kw)
 
+class ContextFields(NamedTuple):
+    """ Per class field information for an InterfaceContext """
+
+    # Field name to type hint
+    types: dict[str, Any]
+
+    # Field name to the function casting values to its type
+    casters: dict[str, Callable[[Any], Any]]
+
+    # Fields that can be set via the query string mapped to whether
+    # they accept multiple values
+    query: dict[str, bool]
+
+# Populated lazily since fields() walks and filters the dataclass
+# fields on every call
+_FIELDS_CACHE: dict[type, ContextFields] = {}
+
+# Type hint origins and arguments checked when unwrapping hints
+_UNION_ORIGINS = frozenset((Union, types.UnionType))
+_LIST_ORIGINS = frozenset((list, Sequence))
+_NONE_TYPES = frozenset((type(None), UnsetOrNone, UnsetType))
+
 def get_next_type(typ: Any) -> Any:
     """ Get the base type from a possibly wrapped type hint. """
     origin = get_origin(typ)
     args   = get_args(typ)
 
     # Optional[T] → just T
-    if origin in [Union, types.UnionType]:
+    if origin in _UNION_ORIGINS:
         if type(None) in args:
-            non_none = []
-            for t in args:
-                if t is type(None):
-                    continue
-                if t in [UnsetOrNone, UnsetType]:
-                    continue
-                non_none.append(t)
+            non_none = [t for t in args if t not in _NONE_TYPES]
             if len(non_none) == 1:
                 return get_next_type(non_none[0])
 
     # Handle the case that the type is a list
-    if origin in [list, Sequence]:
+    if origin in _LIST_ORIGINS:
         return origin
 
     return typ
 
-def cast_str_to_type(data: Any, typ: Any) -> Any:
-    """ Cast query parameter values to the appropriate type based on the provided type hint. """
+def _cast_unchanged(data: Any) -> Any:
+    return data
+
+def _cast_list(data: Any) -> Any:
+    if not data:
+        return []
+    return list(data)
+
+# Strings accepted as True when casting to bool (compared case-insensitively)
+_TRUTHY = frozenset(("1", "true", "yes"))
+
+def _cast_bool(data: Any) -> bool:
+    if isinstance(data, str):
+        # Only pay for the lowercased copy when the value isn't already
+        # in the canonical spelling
+        return data in _TRUTHY or data.lower() in _TRUTHY
+    return bool(data)
+
+def _primitive_caster(typ: type, convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """ Wrap a primitive conversion so that Unset, None and values that
+        are already of the right type pass through
+    """
+    def caster(data: Any) -> Any:
+        # Values copied from another context are already typed
+        if type(data) is typ:
+            return data
+        if isinstance(data, UnsetType):
+            return Unset
+        if data is None:
+            return
+        return convert(data)
+    return caster
+
+_PRIMITIVE_CASTERS: dict[type, Callable[[Any], Any]] = {
+    str: _cast_unchanged,
+    int: _primitive_caster(int, int),
+    float: _primitive_caster(float, float),
+    bool: _primitive_caster(bool, _cast_bool),
+}
+
+@lru_cache(maxsize=None)
+def get_caster(typ: Any) -> Callable[[Any], Any]:
+    """ Resolve the function that casts query parameter values to `typ`.
+        Type hints are only inspected once per type.
+    """
     origin = get_origin(typ)
     args   = get_args(typ)
 
     # Optional[T] → just T
-    if origin in [Union, types.UnionType]:
+    if origin in _UNION_ORIGINS:
         if type(None) in args:
-            non_none = []
-            for t in args:
-                if t is type(None):
-                    continue
-                if t in [UnsetOrNone, UnsetType]:
-                    continue
-                non_none.append(t)
+            non_none = [t for t in args if t not in _NONE_TYPES]
             if len(non_none) == 1:
-                return cast_str_to_type(
-                            data=data,
-                            typ=non_none[0],
-                        )
+                return get_caster(non_none[0])
 
     # Handle the case that the type is a list
-    if origin in [list, Sequence]:
-        if not data:
-            return []
-
-        list_data = []
-        for entry_data in data:
-            list_data.append(
-                cast_str_to_type(
-                    data=entry_data,
-                    typ=origin,
-                )
-            )
-
-        return list_data
+    if origin in _LIST_ORIGINS:
+        return _cast_list
 
-    if isinstance(data, UnsetType):
-        return Unset
+    return _PRIMITIVE_CASTERS.get(typ, _cast_unchanged)
 
-    if data is None:
-        return
-
-    # primitives
-    if typ is str:
-        return data
-
-    if typ is int:
-        return int(data)
-
-    if typ is float:
-        return float(data)
-
-    if typ is bool:
-        if isinstance(data, str):
-            return data.lower() in ("1","true","yes")
-        return bool(data)
-
-    return data
+def cast_str_to_type(data: Any, typ: Any) -> Any:
+    """ Cast query parameter values to the appropriate type based on the provided type hint. """
+    return get_caster(typ)(data)
+
+class ParsedURI(NamedTuple):
+    """ The parts of a URI that from_uri uses """
+    scheme: str
+    netloc: str
+    path: str
+    host: str|None
+    port: int|None
+    username: str|None
+    password: str|None
+    query: str
+
+    # The decoded (key, value) pairs of the query string
+    query_items: tuple[tuple[str, str], ...]
+
+# The ParsedURI fields that map straight onto context fields
+_URI_PART_FIELDS = (
+    "scheme",
+    "netloc",
+    "path",
+    "host",
+    "port",
+    "username",
+    "password",
+)
 
-@dataclass
+def _parse_simple_uri(uri: str) -> ParsedURI|None:
+    """ Split up URIs of the plain `scheme://[user[:pass]@]host[:port][/path][?query]`
+        shape that interfaces use with str.partition rather than urlparse.
+        Returns None for anything else so that urlparse can deal with it.
+    """
+    scheme, sep, rest = uri.partition("://")
+    if (
+        not sep
+        or not uri.isascii()
+        or not scheme.isalnum()
+        or not scheme[0].isalpha()
+        # urlparse strips surrounding whitespace and has rules for
+        # fragments, path params and IPv6 hosts, leave those to it
+        or not uri.isprintable()
+        or uri != uri.strip()
+        or "#" in rest
+        or ";" in rest
+        or "[" in rest
+    ):
+        return None
+
+    netloc, _, query = rest.partition("?")
+    netloc, slash, path = netloc.partition("/")
+    path = slash + path
+
+    username = password = None
+    userinfo, at, hostinfo = netloc.rpartition("@")
+    if at:
+        username, colon, password = userinfo.partition(":")
+        if not colon:
+            password = None
+
+    host, colon, port_str = hostinfo.partition(":")
+    port = None
+    if colon:
+        if ":" in port_str:
+            return None
+        if port_str:
+            if not (port_str.isascii() and port_str.isdigit()):
+                return None
+            port = int(port_str)
+            if port > 65535:
+                return None
+
+    query_items = []
+    if query:
+        for pair in query.split("&"):
+            key, _, value = pair.partition("=")
+            # Like parse_qsl, pairs without a value are dropped
+            if value:
+                query_items.append((unquote_plus(key), unquote_plus(value)))
+
+    return ParsedURI(
+        scheme=scheme.lower(),
+        netloc=netloc,
+        path=path,
+        host=host.lower() or None,
+        port=port,
+        username=username,
+        password=password,
+        query=query,
+        query_items=tuple(query_items),
+    )
+
+@lru_cache(maxsize=1024)
+def parse_uri(uri: str) -> ParsedURI:
+    """ Split up the URI. Interfaces tend to get created for the same
+        handful of URIs so the results, including the split up query
+        string, are cached.
+    """
+    parsed = _parse_simple_uri(uri)
+    if parsed is not None:
+        return parsed
+    return _parse_full_uri(uri)
+
+def _parse_full_uri(uri: str) -> ParsedURI:
+    """ Split up any URI using urlparse """
+    parsed = urlparse(uri)
+    query = parsed.query
+    return ParsedURI(
+        scheme=parsed.scheme,
+        netloc=parsed.netloc,
+        path=parsed.path,
+        host=parsed.hostname,
+        port=parsed.port,
+        username=parsed.username,
+        password=parsed.password,
+        query=query,
+        query_items=tuple(parse_qsl(query)) if query else (),
+    )
+
+# Contexts built by InterfaceContext.from_uri, least recently used first
+FROM_URI_CACHE_SIZE = 256
+_FROM_URI_CACHE: OrderedDict[tuple, "InterfaceContext"] = OrderedDict()
+
+@dataclass(slots=True)
 class InterfaceContext:
     uri: str|UnsetOrNone = UnsetFactory()
     scheme: str|UnsetOrNone = UnsetFactory()
@@ -161,64 +307,112 @@ class InterfaceContext:
 
     extra_params: dict[str, Any] = field(default_factory=dict) 
 
+    @classmethod
+    def context_fields(cls) -> ContextFields:
+        """ Return the cached field information for this class. """
+        try:
+            return _FIELDS_CACHE[cls]
+        except KeyError:
+            pass
+
+        # Names from a class body are already interned but ones built at
+        # runtime (eg. make_dataclass) aren't, intern them so lookups into
+        # these dicts and the instance slots compare by identity
+        types = {sys.intern(f.name): f.type for f in fields(cls)}
+        casters = {name: get_caster(typ) for name, typ in types.items()}
+
+        # Work out up front which fields the query string can set and
+        # whether they accept multiple values
+        query = {}
+        for name, typ in types.items():
+            base_type = get_next_type(typ)
+            if base_type is dict:
+                # We don't handle dicts from query params
+                continue
+            query[name] = base_type in _LIST_ORIGINS
+
+        context_fields = _FIELDS_CACHE[cls] = ContextFields(
+            types=types,
+            casters=casters,
+            query=query,
+        )
+        return context_fields
+
     @classmethod
     def from_uri(cls, uri: str, default_context:"InterfaceContext|None" = None, **extra) -> "InterfaceContext":
         """
         Parse a URI and return its components as a dictionary.
+
+        The same URIs tend to get used over and over so the built
+        contexts are cached and each caller gets a copy. A default
+        context can be changed after the fact so those are always
+        built from scratch.
         """
-        parsed = urlparse(uri)
-        if parsed.query:
-            query_params: dict[str, Any] = parse_qs(parsed.query)
-        else:
-            query_params: dict[str, Any] = {}
+        if default_context is not None:
+            return cls._from_uri(uri, default_context, **extra)
 
-        kwargs = {
-            "uri": uri,
-            "scheme": parsed.scheme,
-            "netloc": parsed.netloc,
-            "path": parsed.path,
-            "host": parsed.hostname,
-            "port": parsed.port,
-            "username": parsed.username,
-            "password": parsed.password,
-            "query": query_params,
+        try:
+            key = (cls, uri, frozenset(extra.items()))
+        except TypeError:
+            # Unhashable extra values, build it every time
+            return cls._from_uri(uri, **extra)
+
+        context = _FROM_URI_CACHE.get(key)
+        if context is not None:
+            _FROM_URI_CACHE.move_to_end(key)
+        else:
+            context = cls._from_uri(uri, **extra)
+            _FROM_URI_CACHE[key] = context
+            if len(_FROM_URI_CACHE) > FROM_URI_CACHE_SIZE:
+                _FROM_URI_CACHE.popitem(last=False)
+
+        # copy() only goes one level deep, the query's lists of values
+        # would still be shared with the cached context
+        copied = context.copy()
+        copied.query = {
+            name: value.copy() if isinstance(value, list) else value
+            for name, value in copied.query.items()
         }
+        return copied
 
-        # Normalize unset values to Unset
-        for k, v in kwargs.items():
-            if v is None:
-                kwargs[k] = Unset
+    @classmethod
+    def _from_uri(cls, uri: str, default_context:"InterfaceContext|None" = None, **extra) -> "InterfaceContext":
+        """ Build a context from the URI, see from_uri """
+        parsed = parse_uri(uri)
+        context_fields = cls.context_fields()
 
-        # Due to how query_params works, it's not straightforward to
+        # Due to how query strings work, it's not straightforward to
         # extract single values vs lists directly from the qs. So we
-        # will use the type hints to normalize the values
-        for f in fields(cls):
-            if f.name not in query_params:
-                continue
-
-            base_type = get_next_type(f.type)
-
-            if base_type in [dict]:
-                # We don't handle dicts from query params
-                continue
-
-            elif base_type in [list, Sequence]:
-                pass
+        # use the type hints to keep single values for primitive fields
+        # and lists for everything else
+        query_params: dict[str, Any] = {}
+        if parsed.query_items:
+            for key, value in parsed.query_items:
+                if context_fields.query.get(key) is False:
+                    # Primitive type, make sure we only have one value
+                    if key in query_params:
+                        raise ValueError(f"Multiple values for a non-list type {[query_params[key], value]}")
+                    query_params[key] = value
+                else:
+                    query_params.setdefault(key, []).append(value)
+
+        kwargs: dict[str, Any] = {
+            "uri": uri,
+            "query": query_params,
+        }
 
-            else:
-                # Primitive type, make sure we only have one value
-                if len(query_params[f.name]) > 1:
-                    raise ValueError(f"Multiple values for a non-list type {query_params[f.name]}")
-                query_params[f.name] = query_params[f.name][0]
+        # Copy the URI parts over in one pass, normalizing missing
+        # values to Unset
+        for name in _URI_PART_FIELDS:
+            value = getattr(parsed, name)
+            kwargs[name] = Unset if value is None else value
 
-        for f in fields(cls):
-            if f.name not in query_params:
-                continue
-            raw_value = query_params[f.name]
-            kwargs[f.name] = cast_str_to_type(
-                data = raw_value,
-                typ = f.type,
-            )
+        # Only visit the query keys that are also fields, most URIs
+        # don't have a query string at all
+        if query_params:
+            casters = context_fields.casters
+            for name in query_params.keys() & context_fields.query.keys():
+                kwargs[name] = casters[name](query_params[name])
 
         kwargs.update(extra)
 
@@ -231,17 +425,50 @@ class InterfaceContext:
             **kwargs
         ) -> "InterfaceContext":
         """ Return a copy of the configuration with default values filled in. """
+        # Collect the values from options then kwargs so the context
+        # can be built with a single constructor call, anything not
+        # provided picks up the class defaults
+        values = dict(cls._cast_options(options))
+        values.update(cls._cast_options(kwargs))
+        return cls(**values)
 
-        # Setup with default values
-        context = cls()
-
-        if options:
-            context.update(options)
+    @classmethod
+    def _cast_options(cls, options: "InterfaceContext|dict|None") -> Iterator[tuple[str, Any]]:
+        """ Yield the (name, value) pairs that are set in options, cast
+            to the field types. Unknown keys and Unset values are skipped.
+        """
+        casters = cls.context_fields().casters
+        if isinstance(options, InterfaceContext):
+            # Options may be a parent or sibling class so fields that it
+            # doesn't have count as unset
+            for name, caster in casters.items():
+                raw_value = getattr(options, name, Unset)
+                if raw_value is Unset:
+                    continue
+                # Don't share containers with the other instance
+                if isinstance(raw_value, (dict, list)):
+                    raw_value = raw_value.copy()
+                yield name, caster(raw_value)
 
-        if kwargs:
-            context.update(kwargs)
+        elif isinstance(options, dict):
+            for name, raw_value in options.items():
+                caster = casters.get(name)
+                if caster is None or raw_value is Unset:
+                    continue
+                yield name, caster(raw_value)
 
-        return context
+    def _shallow_asdict(self) -> dict[str, Any]:
+        """ Return the fields as a dict. Unlike dataclasses.asdict this
+            doesn't deepcopy every value, only dicts and lists get copied
+            (one level) so they aren't shared with this instance.
+        """
+        data = {}
+        for name in self.context_fields().types:
+            value = getattr(self, name)
+            if isinstance(value, (dict, list)):
+                value = value.copy()
+            data[name] = value
+        return data
 
     def asdict(self, fields:list[str]|None = None):
         if fields:
@@ -253,29 +480,16 @@ class InterfaceContext:
                         continue
                     data[f] = field_data
             return data
-        return asdict(self)
+        return self._shallow_asdict()
 
     def copy(self) -> "InterfaceContext":
         """Return a copy of the configuration."""
-        return self.__class__(**asdict(self))
+        return self.__class__(**self._shallow_asdict())
 
     def update(self, options: "InterfaceContext|dict") -> "InterfaceContext":
         """Update the configuration with another InterfaceContext instance."""
-        attribs_as_dict = {}
-        if isinstance(options, self.__class__):
-            attribs_as_dict = asdict(options)
-        elif isinstance(options, dict):
-            attribs_as_dict = options
-
-        for f in fields(self.__class__):
-            if f.name not in attribs_as_dict:
-                continue
-            raw_value = attribs_as_dict[f.name]
-            if raw_value is Unset:
-                continue
-            massaged_value = cast_str_to_type(raw_value, f.type)
-            setattr(self, f.name, massaged_value)
-
+        for name, value in self._cast_options(options):
+            setattr(self, name, value)
         return self
 
     def fill_missing(self, defaults: "InterfaceContext|dict") -> "InterfaceContext":
@@ -284,12 +498,12 @@ class InterfaceContext:
         # Normalize to dict
         attribs_as_dict = {}
         if isinstance(defaults, self.__class__):
-            attribs_as_dict = asdict(defaults)
+            attribs_as_dict = defaults._shallow_asdict()
         elif isinstance(defaults, dict):
             attribs_as_dict = defaults
 
-        for f in fields(self.__class__):
-            if f.name not in attribs_as_dict:
+        for name in self.context_fields().types:
+            if name not in attribs_as_dict:
                 continue
 
         return self
@@ -299,16 +513,15 @@ class InterfaceContext:
         try:
             return getattr(self, key)
         except AttributeError:
-            val = self.query.get(
-                        key,
-                        self.extra_params.get(
-                            key,
-                            default
-                        )
-                    )
-            return val
-
-@dataclass
+            pass
+
+        # Only fall through to extra_params when the query doesn't have it
+        query = self.query
+        if key in query:
+            return query[key]
+        return self.extra_params.get(key, default)
+
+@dataclass(slots=True)
 class DefaultValuesContext(InterfaceContext):
     rows: int|UnsetOrNone = DEFAULT_ROWS
     cols: int|UnsetOrNone = DEFAULT_COLS
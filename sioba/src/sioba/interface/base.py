@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from importlib.metadata import entry_points
 
-from urllib.parse import urlparse
-
 from typing import (
     Callable,
     Optional,
@@ -15,6 +13,7 @@ from typing import (
 import asyncio
 import uuid
 import enum
+import re
 
 from loguru import logger
 
@@ -26,18 +25,26 @@ from ..errors import (
 from ..context import (
     InterfaceContext,
     DefaultValuesContext,
+    parse_uri,
 )
 from ..buffer.base import (
     Buffer,
     buffer_from_uri,
 )
 
+# Newlines that aren't already part of a \r\n pair, so converting
+# output that already has \r\n doesn't double up the \r
+LF_TO_CRLF = re.compile(rb"(?<!\r)\n")
+
 ###########################################################
 # Registry for Interfaces
 ###########################################################
 
 INTERFACE_REGISTRY: dict[str, type] = {}
 
+# Sorted result of list_schemes(), reset whenever a scheme is registered
+_SCHEMES_CACHE: Optional[list[str]] = None
+
 def register_scheme(
         *schemes: str,
         context_class: Optional[type] = None
@@ -49,6 +56,8 @@ def register_scheme(
         class EchoInterface: ...
     """
     def decorator(cls_or_factory):
+        global _SCHEMES_CACHE
+        _SCHEMES_CACHE = None
         for scheme in schemes:
             lower = scheme.lower()
             if lower in INTERFACE_REGISTRY:
@@ -67,9 +76,14 @@ def list_schemes() -> list[str]:
     Returns a dictionary of all registered interfaces.
     The keys are the URI schemes, and the values are the interface classes.
     """
-    eps = entry_points().select(group="sioba.interface")
-    schemes = set([ep.name.lower() for ep in eps]) | set(INTERFACE_REGISTRY.keys())
-    return list(sorted(schemes))
+    global _SCHEMES_CACHE
+    # Scanning the installed entry points is slow and they don't change
+    # while we're running, so only redo it after a new registration
+    if _SCHEMES_CACHE is None:
+        eps = entry_points().select(group="sioba.interface")
+        schemes = set([ep.name.lower() for ep in eps]) | set(INTERFACE_REGISTRY.keys())
+        _SCHEMES_CACHE = sorted(schemes)
+    return list(_SCHEMES_CACHE)
 
 def interface_from_uri(
                 uri: str,
@@ -81,8 +95,9 @@ def interface_from_uri(
                 **kwargs,
                 ):
 
-    parsed = urlparse(uri)
-    scheme = parsed.scheme.lower()
+    # Pages tend to create interfaces for the same URI over and over so
+    # use the cached parse, which from_uri then reuses for the context
+    scheme = parse_uri(uri).scheme.lower()
 
     # If we don't already have a type, let's have a looki at the
     # entry points to see if we can find a handler for this scheme.
@@ -235,6 +250,10 @@ class Interface:
         # Things such as rows, cols
         self.term_clients = {}
 
+        # The last get_terminal_buffer() result and the convertEol
+        # setting it was made with, cleared whenever the screen changes
+        self._terminal_buffer_cache: Optional[tuple[Any, bytes]] = None
+
         # Any extra parameters that a subclass might need
         self.extra = extra
 
@@ -351,7 +370,11 @@ class Interface:
         self._on_receive_from_frontend_callbacks.add(on_receive)
 
     async def send_to_frontend(self, data: bytes) -> None:
-        """Sends data (in bytes) to the xterm"""
+        """Sends data (in bytes) to the xterm
+
+        Returns once the buffer has been fed and every on_send_to_frontend
+        callback has run, so callers need not wait for the delivery.
+        """
         if self.state == InterfaceState.INITIALIZED:
             raise InterfaceNotStarted(f"Unable to send data {repr(data)}, interface not started")
         elif self.state == InterfaceState.SHUTDOWN:
@@ -361,22 +384,26 @@ class Interface:
         if not data:
             return
 
-        if self.context.convertEol:
-            tmp = data.replace(b"\n", b"\r\n")
-            logger.debug(f"send_to_frontend: `{data}` [convertEol]=> `{tmp}`")
+        if self.context.convertEol and b"\n" in data:
+            tmp = LF_TO_CRLF.sub(b"\r\n", data)
+            logger.debug("send_to_frontend: `{}` [convertEol]=> `{}`", data, tmp)
             data = tmp
         else:
-            logger.debug(f"send_to_frontend: `{data}`")
+            logger.debug("send_to_frontend: `{}`", data)
 
         # Process the data through a subclassable function
         await self.send_to_frontend_handle(data)
 
-        # updates the pyte screen before passing data through
+        # updates the pyte screen before passing data through. A feed
+        # that yields could let the old screen be dumped and cached
+        # partway through so the cache is cleared again once it's done
+        self._terminal_buffer_cache = None
         await self.buffer.feed(data)
+        self._terminal_buffer_cache = None
 
         # Dispatch to all listeners
         for on_send in self._on_send_from_xterm_callbacks:
-            logger.debug(f"Sending data to xterm: {self.context.convertEol} / {data}")
+            logger.debug("Sending data to xterm: {} / {}", self.context.convertEol, data)
             res = on_send(self, data)
             if asyncio.iscoroutine(res):
                 await res
@@ -390,16 +417,20 @@ class Interface:
 
     async def receive_from_frontend(self, data: bytes) -> None:
         """Receives data from the xterm as a sequence of bytes.
+
+        Returns once the data has been handled and every
+        on_receive_from_frontend callback has run.
         """
 
-        if self.context.convertEol:
+        # Keystrokes rarely carry a \r so skip the rewrite when there's none
+        if self.context.convertEol and b"\r" in data:
             # We convert all \r\n and just \r to \n since we want to
             # handle newlines in a consistent manner as \n
             tmp = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
-            logger.debug(f"receive_from_frontend: `{data}` [convertEol]=> `{tmp}`")
+            logger.debug("receive_from_frontend: `{}` [convertEol]=> `{}`", data, tmp)
             data = tmp
         else:
-            logger.debug(f"recieve_from_frontend: `{data}`")
+            logger.debug("recieve_from_frontend: `{}`", data)
 
         # Process the data through a subclassable function
         await self.receive_from_frontend_handle(data)
@@ -463,6 +494,7 @@ class Interface:
 
     def set_terminal_size(self, rows: int, cols: int, xpix: int=0, ypix: int=0) -> None:
         """Sets the shell window size."""
+        self._terminal_buffer_cache = None
         self.buffer.set_terminal_size(
             rows=rows,
             cols=cols,
@@ -472,9 +504,17 @@ class Interface:
 
     def get_terminal_buffer(self) -> bytes:
         """Get the current screen contents as a string"""
+        # Dumping walks the whole screen so reuse the last dump until
+        # something is written or the terminal is resized
+        convertEol = self.context.convertEol
+        cached = self._terminal_buffer_cache
+        if cached is not None and cached[0] == convertEol:
+            return cached[1]
+
         buf = self.buffer.get_terminal_buffer()
-        if self.context.convertEol:
-            buf = buf.replace(b"\n", b"\r\n")
+        if convertEol:
+            buf = LF_TO_CRLF.sub(b"\r\n", buf)
+        self._terminal_buffer_cache = (convertEol, buf)
         return buf
 
     def get_terminal_cursor_position(self) -> tuple:
@@ -519,9 +559,19 @@ class Interface:
 
     def reference_increment(self):
         self.reference_count += 1
+        logger.opt(lazy=True).debug(
+            "Interface {} reference count: {}",
+            lambda: self.id,
+            lambda: self.reference_count,
+        )
 
     def reference_decrement(self):
         self.reference_count -= 1
+        logger.opt(lazy=True).debug(
+            "Interface {} reference count: {}",
+            lambda: self.id,
+            lambda: self.reference_count,
+        )
         if self.reference_count <= 0:
             if self.context.auto_shutdown:
                 asyncio.create_task(
@@ -1,6 +1,8 @@
 import threading
+import collections
 import janus
 import asyncio
+import inspect
 import re
 
 from rich.console import Console
@@ -16,18 +18,34 @@ import weakref
 
 from loguru import logger
 
+# Line endings and the control characters that input handling acts on
+CONTROL_CHARACTERS = re.compile(rb"\r\n|\r|\n\r|\x03|\x08|\x7f")
+
 def get_next_line(data: bytes) -> tuple[bytes, bytes, bytes]:
     """Get the next line from the data, returning the line and the remaining data."""
-    splits = re.split(rb"(\r\n|\r|\n\r|\x03|\x08|\x7f)", data, maxsplit=1)
-    if len(splits) < 3:
+    match = CONTROL_CHARACTERS.search(data)
+    if match is None:
         return data, b'', b''
 
-    next_line, control_character, remainder = splits
-
+    start, end = match.span()
+    control_character = match.group()
     if control_character in (b'\r\n', b'\n\r', b'\r'):
         control_character = b'\n'
 
-    return next_line, control_character, remainder
+    return data[:start], control_character, data[end:]
+
+def is_plain_text(text: str, width: int) -> bool:
+    """ True if a console without colour would print the text unchanged.
+        That is, no markup or emoji codes and nothing that would get
+        wrapped or expanded
+    """
+    return (
+        len(text) <= width
+        and text.isascii()
+        and text.isprintable()
+        and "[" not in text
+        and ":" not in text
+    )
 
 class CaptureMode(Enum):
     """ Capture mode is used to determine how the interface
@@ -49,11 +67,15 @@ class FunctionInterface(Interface):
         self.function = function
 
         # For input prompts
-        self.input_buffer: bytes = b""
+        self.input_buffer: bytearray = bytearray()
         self.input_is_password = False
 
-        # Send to frontend queue
-        self.send_queue: janus.Queue[bytes] = janus.Queue()
+        # Send to frontend queue. Data is appended from both the function
+        # thread and the event loop, send_event wakes send_to_frontend_loop
+        # which then sends everything queued so far in one go
+        self.send_deque: collections.deque[bytes] = collections.deque()
+        self.send_event: asyncio.Event = asyncio.Event()
+        self.send_closed = False
 
         # Incoming input from frontend queue
         self.input_queue: janus.Queue[bytes] = janus.Queue()
@@ -62,9 +84,13 @@ class FunctionInterface(Interface):
         self.capture_last_state: CaptureMode = self.capture_mode
 
         self.function_thread: threading.Thread|None = None
+        self.function_task: asyncio.Task|None = None
 
         self.main_loop = None  # Will store the main asyncio loop
 
+        # Used to format print() output
+        self.console = Console()
+
     async def start_interface(self) -> bool:
         """Launch the wrapped function in a separate thread"""
         logger.debug("Launching function interface")
@@ -79,6 +105,12 @@ class FunctionInterface(Interface):
         logger.debug("Starting send_to_frontend_loop")
         asyncio.create_task(self.send_to_frontend_loop())
 
+        # Coroutine functions run as a task on the loop rather than
+        # tying up a thread for each session
+        if inspect.iscoroutinefunction(self.function):
+            self.function_task = asyncio.create_task(self._run_coroutine())
+            return True
+
         # Launch the function
         def _run_function():
             logger.debug(f"Running function {self.function}")
@@ -94,6 +126,7 @@ class FunctionInterface(Interface):
             # With any exception, we want to shutdown the interface
             # and clean up the queues
             except Exception as e:
+                logger.opt(exception=e).debug(f"Function {self.function} raised an exception")
                 try:
                     shutdown_future = asyncio.run_coroutine_threadsafe(
                         coro = self.shutdown(),
@@ -111,22 +144,63 @@ class FunctionInterface(Interface):
 
         return True
 
+    async def _run_coroutine(self) -> None:
+        """Run a coroutine function, shutting down the interface if it fails"""
+        logger.debug(f"Running coroutine function {self.function}")
+        try:
+            await self.function(weakref.proxy(self))
+        except (InterfaceShutdown, asyncio.CancelledError):
+            # This is just a notification that we're shutdown
+            pass
+        except Exception as e:
+            logger.opt(exception=e).debug(f"Function {self.function} raised an exception")
+            await self.shutdown()
+        logger.debug(f"Function {self.function} finished")
+
     async def shutdown_handle(self) -> None:
         """Shutdown the interface"""
-        if self.send_queue:
-            await self.send_queue.aclose()
+        self.send_closed = True
+        self.send_event.set()
+
+        # Stop a coroutine function unless it's the one shutting us down
+        task = self.function_task
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    def queue_to_frontend(self, data: bytes) -> None:
+        """ Queue data to be sent to the frontend. This is safe to call
+            from both the function thread and the event loop.
+        """
+        if self.send_closed:
+            raise InterfaceShutdown("Interface is shut down, cannot send data")
+
+        self.send_deque.append(data)
+
+        # The loop clears the event before draining so if it's still set
+        # the data we just added is guaranteed to be picked up
+        if not self.send_event.is_set():
+            try:
+                self.main_loop.call_soon_threadsafe(self.send_event.set)
+            except RuntimeError:
+                raise InterfaceShutdown("Interface is shut down, cannot send data")
 
     async def send_to_frontend_loop(self) -> None:
         while self.state == InterfaceState.STARTED:
             try:
-                # Get data from the queue with a timeout to allow checking the state
-                data = await self.send_queue.async_q.get()
+                await self.send_event.wait()
+                self.send_event.clear()
+                if self.send_closed:
+                    break
+
+                # Coalesce everything queued since the last wakeup
+                chunks = []
+                while self.send_deque:
+                    chunks.append(self.send_deque.popleft())
+                if not chunks:
+                    continue
 
                 # Send data to the terminal using the main event loop
-                await self.send_to_frontend(data)
-
-            except janus.QueueShutDown:
-                break
+                await self.send_to_frontend(b"".join(chunks))
 
             except asyncio.CancelledError:
                 break
@@ -134,49 +208,73 @@ class FunctionInterface(Interface):
             except InterfaceShutdown:
                 break
 
-    def print(self, *a, **kw) -> None:
+            # Nothing awaits this task so make sure failures get reported
+            except Exception:
+                logger.exception("Error in send_to_frontend_loop")
+                break
+
+    def print(self, *a, end: str = "\n", **kw) -> None:
         """Print text to the terminal"""
         if self.state == InterfaceState.INITIALIZED:
             raise InterfaceNotStarted("Unable to print, interface not started")
         if self.state == InterfaceState.SHUTDOWN:
             raise InterfaceShutdown("Unable to print, interface is shut down")
 
-        # Use the python string handling to format the text
-        console = Console()
-        with console.capture() as capture:
-            console.print(*a, **kw)
-        text = capture.get()
+        console = self.console
+        if (
+            not kw
+            and len(a) == 1
+            and isinstance(a[0], str)
+            and console.color_system is None
+            and is_plain_text(a[0], console.width)
+        ):
+            # Most calls are a single plain string which a console
+            # without colour outputs as is, so skip the capture. With
+            # colour, rich's highlighter may still style numbers, URLs...
+            text = a[0] + end
+        else:
+            # Let rich handle the formatting
+            with console.capture() as capture:
+                console.print(*a, end=end, **kw)
+            text = capture.get()
 
         # Put the data in the send queue
-        try:
-            self.send_queue.sync_q.put(text.encode())
-        except Exception as ex:
-            raise InterfaceShutdown("Interface is shut down, cannot send data")
+        self.queue_to_frontend(text.encode())
 
-    def capture(self, prompt: str, capture_mode: CaptureMode) -> str:
-        """Get password input (doesn't echo) from the terminal"""
+    def _begin_capture(self, prompt: str, capture_mode: CaptureMode) -> None:
+        """Switch to the capture mode and display the prompt"""
         if self.state == InterfaceState.INITIALIZED:
             raise InterfaceNotStarted("Unable to get input, interface not started")
         if self.state == InterfaceState.SHUTDOWN:
             raise InterfaceShutdown("Unable to get input, interface is shut down")
 
         # Clear any previous input
-        self.input_buffer = b""
+        self.input_buffer.clear()
         self.capture_mode = capture_mode
 
         # Display the prompt
         if prompt:
             self.print(prompt, end="")
 
-        # Wait for input to be ready (the event will be set in receive())
-        data = self.input_queue.sync_q.get()
-
+    def _end_capture(self, data: bytes) -> str:
         # Reset the capture mode
         self.capture_mode = self.capture_last_state
 
         # Return the collected input
         return data.decode()
 
+    def capture(self, prompt: str, capture_mode: CaptureMode) -> str:
+        """Get password input (doesn't echo) from the terminal"""
+        self._begin_capture(prompt, capture_mode)
+
+        # Wait for input to be ready (the event will be set in receive())
+        return self._end_capture(self.input_queue.sync_q.get())
+
+    async def acapture(self, prompt: str, capture_mode: CaptureMode) -> str:
+        """Like capture() but for coroutine functions, waits on the loop"""
+        self._begin_capture(prompt, capture_mode)
+        return self._end_capture(await self.input_queue.async_q.get())
+
     def input(self, prompt: str="") -> str:
         """Get input from the terminal"""
         return self.capture(prompt, CaptureMode.INPUT)
@@ -185,16 +283,24 @@ class FunctionInterface(Interface):
         # Return the collected input
         return self.capture(prompt, CaptureMode.GETPASS)
 
+    async def ainput(self, prompt: str="") -> str:
+        """Get input from the terminal in a coroutine function"""
+        return await self.acapture(prompt, CaptureMode.INPUT)
+
+    async def agetpass(self, prompt: str="") -> str:
+        """Get hidden input from the terminal in a coroutine function"""
+        return await self.acapture(prompt, CaptureMode.GETPASS)
+
     async def receive_from_frontend(self, data: bytes) -> None:
         """ For the function interface, we receive the input from
             the frontend but unless we we're set to ECHO we don't
             send the data back to be displayed. For things like 
             INPUT and GETPASS we will send the data back, we use
             a capture into the self.input_buffer and when we receive
-            a newline, throw the data into a self.send_queue. What
+            a newline, throw the data into a self.input_queue. What
             is expected is that there's another async function
             waiting for the input to be ready, which is blocked until
-            it receives the data via the self.send_queue
+            it receives the data via the self.input_queue
         """
         if self.state == InterfaceState.INITIALIZED:
             raise InterfaceNotStarted("Interface not ready to receive data")
@@ -202,81 +308,82 @@ class FunctionInterface(Interface):
             raise InterfaceShutdown("Interface is shut down")
 
         try:
-            next_line, control_character, remainder = get_next_line(data)
-
-            ##############################################
-            # DISCARD mode
-            ##############################################
-            if self.capture_mode == CaptureMode.DISCARD:
-                if control_character == b'\x03':  # Ctrl-C
-                    logger.debug("Ctrl-C received, shutting down")
-                    await self.shutdown()
-                return
-
-            ##############################################
-            # ECHO mode
-            ##############################################
-            if self.capture_mode == CaptureMode.ECHO:
-                self.input_buffer += next_line
-
-                # If we have a newline, we need to mark it as a finished
-                # line of text to enter
-                if control_character == b'\n':
-                    await self.send_queue.async_q.put(next_line)
-                    await self.receive_from_frontend(remainder)  # Process the rest
-                    return
-
-                elif control_character == b'\x03':  # Ctrl-C
-                    pre_break = data.split(b'\x03', maxsplit=1)[0]
-                    await self.send_queue.async_q.put(pre_break)
-                    logger.debug("Ctrl-C received, shutting down")
-                    await self.shutdown()
-                    return
-
-                # If we're not capturing input, just send the data
-                await self.send_queue.async_q.put(next_line)
-                return
-
-            ##############################################
-            # INPUT or GETPASS mode
-            ##############################################
-
-            if next_line:
-                # Add the character to the buffer
-                self.input_buffer += next_line
-                if self.capture_mode == CaptureMode.INPUT:
-                    await self.send_queue.async_q.put(next_line)
-
-            # Process based on the input character
-            if control_character == b'\n':  # Enter key pressed
-                # Store the result and signal it's ready
-                input_result = self.input_buffer
-                self.input_buffer = b""
-                await self.send_queue.async_q.put(b'\n')
-                self.input_queue.sync_q.put(input_result)
-
-            elif control_character == b'\x03':  # Ctrl-C
-                # Signal the input is ready
-                #self.input_queue.sync_q.put(b'\x03')
-                logger.debug("Ctrl-C received, shutting down")
-                await self.shutdown()
-                self.input_queue.sync_q.put(b"")
-
-            # backspace or delete key pressed
-            elif control_character in (b'\x7f', b'\x08'):
-                if self.input_buffer:
-                    # Remove the last character
-                    self.input_buffer = self.input_buffer[:-1]
-
-                    # Echo the backspace action if in INPUT mode
-                    if self.capture_mode == CaptureMode.INPUT:
-                        await self.send_queue.async_q.put(b'\b \b')
-
-        except janus.QueueShutDown:
+            # Each capture mode has its own handler so we only need
+            # to look up the mode once per chunk of input
+            handler = self._receive_handlers[self.capture_mode]
+            await handler(self, *get_next_line(data))
+
+        except InterfaceShutdown:
             # No longer need to respond
             pass
 
-
-
-
-
+    async def _receive_discard(self, next_line: bytes, control_character: bytes, remainder: bytes) -> None:
+        """ DISCARD mode, only watch for Ctrl-C """
+        if control_character == b'\x03':  # Ctrl-C
+            logger.debug("Ctrl-C received, shutting down")
+            await self.shutdown()
+
+    async def _receive_echo(self, next_line: bytes, control_character: bytes, remainder: bytes) -> None:
+        """ ECHO mode, send the received text back to the frontend """
+        # Walk through each finished line of text collecting the
+        # echo so it's queued in one go
+        echo = bytearray()
+        while True:
+            self.input_buffer.extend(next_line)
+            echo += next_line
+            if control_character != b'\n':
+                break
+            next_line, control_character, remainder = get_next_line(remainder)
+
+        if echo:
+            self.queue_to_frontend(bytes(echo))
+
+        if control_character == b'\x03':  # Ctrl-C
+            logger.debug("Ctrl-C received, shutting down")
+            await self.shutdown()
+
+    async def _receive_capture(self, next_line: bytes, control_character: bytes, remainder: bytes) -> None:
+        """ INPUT or GETPASS mode, collect a line for capture() """
+        echo = bytearray()
+        if next_line:
+            # Add the character to the buffer
+            self.input_buffer.extend(next_line)
+            if self.capture_mode == CaptureMode.INPUT:
+                echo += next_line
+
+        # Process based on the input character
+        input_result = None
+        if control_character == b'\n':  # Enter key pressed
+            # Store the result, it's signalled once the echo is queued
+            input_result = bytes(self.input_buffer)
+            self.input_buffer.clear()
+            echo += b'\n'
+
+        # backspace or delete key pressed
+        elif control_character in (b'\x7f', b'\x08'):
+            if self.input_buffer:
+                # Remove the last character
+                del self.input_buffer[-1:]
+
+                # Echo the backspace action if in INPUT mode
+                if self.capture_mode == CaptureMode.INPUT:
+                    echo += b'\b \b'
+
+        if echo:
+            self.queue_to_frontend(bytes(echo))
+
+        if input_result is not None:
+            self.input_queue.sync_q.put(input_result)
+
+        elif control_character == b'\x03':  # Ctrl-C
+            # Signal the input is ready
+            logger.debug("Ctrl-C received, shutting down")
+            await self.shutdown()
+            self.input_queue.sync_q.put(b"")
+
+    _receive_handlers = {
+        CaptureMode.DISCARD: _receive_discard,
+        CaptureMode.ECHO: _receive_echo,
+        CaptureMode.INPUT: _receive_capture,
+        CaptureMode.GETPASS: _receive_capture,
+    }
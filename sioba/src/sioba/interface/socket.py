@@ -1,22 +1,127 @@
 import asyncio
+import collections
 from typing import Optional, Callable
 from .base import Interface, InterfaceState, InterfaceContext, register_scheme
 from .io import IOInterface
+from ..context import Unset, UnsetFactory, UnsetOrNone
 from loguru import logger
 from dataclasses import dataclass
 import socket
 
-@register_scheme("tcp")
+# Larger reads mean fewer wakeups of the receive loop on fast links
+DEFAULT_READ_CHUNK_SIZE = 65536
+
+@dataclass(slots=True)
+class SocketContext(InterfaceContext):
+    """Configuration for socket connections"""
+    # Maximum number of bytes to take from the socket per read
+    read_chunk_size: int|UnsetOrNone = UnsetFactory()
+
+    # Socket options, when unset the OS defaults are left alone
+    so_rcvbuf: int|UnsetOrNone = UnsetFactory()
+    so_sndbuf: int|UnsetOrNone = UnsetFactory()
+    tcp_nodelay: bool|UnsetOrNone = UnsetFactory()
+
+class SocketProtocol(asyncio.BufferedProtocol):
+    """ Reads straight into a preallocated buffer rather than going through
+        a StreamReader, which copies everything into its own buffer and
+        then again when it's read out. Received data is queued for the
+        interface's receive loop.
+    """
+
+    def __init__(self, read_chunk_size: int = DEFAULT_READ_CHUNK_SIZE):
+        self.transport: Optional[asyncio.Transport] = None
+        self.buffer = memoryview(bytearray(read_chunk_size))
+
+        # Data waiting for the receive loop. Reading from the socket is
+        # paused while more than high_water bytes are waiting
+        self.received: collections.deque[bytes] = collections.deque()
+        self.received_size = 0
+        self.high_water = max(2 * read_chunk_size, 1 << 20)
+        self.data_ready = asyncio.Event()
+
+        # Cleared while the transport's write buffer is full
+        self.can_write = asyncio.Event()
+        self.can_write.set()
+
+        self.closed = asyncio.Event()
+        self.exception: Optional[Exception] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint: int):
+        return self.buffer
+
+    def buffer_updated(self, nbytes: int):
+        self.received.append(bytes(self.buffer[:nbytes]))
+        self.received_size += nbytes
+        self.data_ready.set()
+        if self.received_size > self.high_water:
+            self.transport.pause_reading()
+
+    def eof_received(self):
+        self.data_ready.set()
+
+    def connection_lost(self, exc):
+        self.exception = exc
+        self.closed.set()
+        self.data_ready.set()
+        self.can_write.set()
+
+    def pause_writing(self):
+        self.can_write.clear()
+
+    def resume_writing(self):
+        self.can_write.set()
+
+    async def read(self) -> bytes:
+        """ Wait for data and return everything received so far. Returns
+            b"" once the connection is closed.
+        """
+        while not self.received:
+            if self.closed.is_set() or self.transport.is_closing():
+                if self.exception:
+                    raise self.exception
+                return b""
+            self.data_ready.clear()
+            await self.data_ready.wait()
+
+        if len(self.received) == 1:
+            data = self.received.popleft()
+        else:
+            data = b"".join(self.received)
+            self.received.clear()
+        if self.received_size > self.high_water:
+            self.transport.resume_reading()
+        self.received_size = 0
+        return data
+
+    def write(self, data: bytes) -> None:
+        self.transport.write(data)
+
+    async def drain(self) -> None:
+        """ Wait until the transport is ready for more data """
+        if self.closed.is_set():
+            raise self.exception or ConnectionResetError("Connection lost")
+        await self.can_write.wait()
+
+    async def close(self) -> None:
+        """ Close the transport and wait for the connection to go away """
+        self.transport.close()
+        await self.closed.wait()
+
+@register_scheme("tcp", context_class=SocketContext)
 class SocketInterface(Interface):
 
     default_context: InterfaceContext = InterfaceContext(
         convertEol=False,
     )
 
-    reader: Optional[asyncio.StreamReader] = None
-    writer: Optional[asyncio.StreamWriter] = None
+    transport: Optional[asyncio.Transport] = None
+    protocol: Optional[SocketProtocol] = None
     _receive_task: Optional[asyncio.Task] = None
-    _send_task: Optional[asyncio.Task] = None
+    read_chunk_size: int = DEFAULT_READ_CHUNK_SIZE
 
     async def start_interface(self) -> bool:
         """Launch the socket interface"""
@@ -29,26 +134,59 @@ class SocketInterface(Interface):
             "host": context.host,
             "port": context.port,
         }
-        self.reader, self.writer = await asyncio.open_connection(**connection)
+        await self.open_connection(**connection)
 
-        # Create and start the receive and send tasks
+        # Create and start the receive task, writes go straight to the
+        # transport from receive_from_frontend_handle
         self._receive_task = asyncio.create_task(self._receive_loop())
 
-        # Async queue for send operations
-        self.send_queue = asyncio.Queue()
-
         return True
 
-    @logger.catch
+    async def open_connection(self, **connection) -> None:
+        """Open the connection to the remote end"""
+        context: SocketContext = self.context # type: ignore
+        self.read_chunk_size = context.read_chunk_size or DEFAULT_READ_CHUNK_SIZE
+
+        loop = asyncio.get_running_loop()
+        self.transport, self.protocol = await loop.create_connection(
+            lambda: SocketProtocol(self.read_chunk_size),
+            **connection
+        )
+        self.configure_socket()
+
+    def configure_socket(self) -> None:
+        """Apply the socket options from the context"""
+        if not self.transport:
+            return
+        sock = self.transport.get_extra_info("socket")
+        if sock is None:
+            return
+
+        context: SocketContext = self.context # type: ignore
+        if context.so_rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, context.so_rcvbuf)
+        if context.so_sndbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, context.so_sndbuf)
+        if context.tcp_nodelay is not Unset:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(bool(context.tcp_nodelay)))
+
+        # The kernel may clamp or adjust the sizes so report what we got
+        logger.opt(lazy=True).debug(
+            "Socket options rcvbuf={} sndbuf={} nodelay={}",
+            lambda: sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF),
+            lambda: sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF),
+            lambda: sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY),
+        )
+
     async def _receive_loop(self):
         """Continuously receive data from the socket"""
         while self.state == InterfaceState.STARTED:
             try:
-                if not ( reader := self.reader ):
-                    logger.error("Socket reader is not initialized")
+                if not ( protocol := self.protocol ):
+                    logger.error("Socket protocol is not initialized")
                     return
 
-                if not ( data := await reader.read(4096) ):
+                if not ( data := await protocol.read() ):
                     await self.shutdown()
                     return
 
@@ -56,20 +194,29 @@ class SocketInterface(Interface):
                 await self.send_to_frontend(data)
 
             except ConnectionResetError as e:
-                logger.debug(f"Connection reset: {e}")
+                logger.debug("Connection reset: {}", e)
                 await self.shutdown()
                 return
 
             except Exception as e:
-                logger.error(f"Error in receive loop: {e=} {type(e)}")
+                logger.error("Error in receive loop: e={!r} {}", e, type(e))
                 await self.shutdown()
                 return
 
-    @logger.catch
     async def receive_from_frontend_handle(self, data: bytes):
-        """Add data to the send queue"""
-        if self.writer:
-            self.writer.write(data)
+        """Write the data to the socket"""
+        if not ( protocol := self.protocol ):
+            return
+        protocol.write(data)
+
+        # Only waits when the transport's buffer is over the high water
+        # mark, so a slow remote end pushes back rather than us
+        # buffering without bound
+        try:
+            await protocol.drain()
+        except ConnectionError as e:
+            logger.debug("Connection lost: {}", e)
+            await self.shutdown()
 
     async def shutdown_handle(self):
         """Shutdown the interface"""
@@ -77,18 +224,17 @@ class SocketInterface(Interface):
         if self._receive_task:
             self._receive_task.cancel()
 
-        # Close the writer
-        if self.writer:
-            self.writer.close()
+        # Close the connection
+        if self.protocol:
             try:
-                await self.writer.wait_closed()
+                await self.protocol.close()
             except ConnectionAbortedError:
                 pass
 
 from ssl import SSLContext, create_default_context, SSLError
 
-@dataclass
-class SecureSocketContext(InterfaceContext):
+@dataclass(slots=True)
+class SecureSocketContext(SocketContext):
     """Configuration for secure socket connections"""
     create_ssl_context: Optional[
                                 Callable[["SecureSocketInterface"], SSLContext]
@@ -118,14 +264,12 @@ class SecureSocketInterface(SocketInterface):
             "port": context.port,
             "ssl": ssl_ctx,
         }
-        self.reader, self.writer = await asyncio.open_connection(**connection)
+        await self.open_connection(**connection)
 
-        # Create and start the receive and send tasks
+        # Create and start the receive task, writes go straight to the
+        # transport from receive_from_frontend_handle
         self._receive_task = asyncio.create_task(self._receive_loop())
 
-        # Async queue for send operations
-        self.send_queue = asyncio.Queue()
-
         return True
 
     async def shutdown_handle(self):
@@ -1,7 +1,7 @@
-from unittest import IsolatedAsyncioTestCase
+from utils.asynccase import SharedLoopAsyncTestCase
 from sioba import list_buffer_schemes
 
-class TestBufferBasic(IsolatedAsyncioTestCase):
+class TestBufferBasic(SharedLoopAsyncTestCase):
 
     async def test_buffer_list(self):
         """ Test if we can list buffers without errors. """
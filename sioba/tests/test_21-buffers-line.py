@@ -1,11 +1,11 @@
-from unittest import IsolatedAsyncioTestCase
+from utils.asynccase import SharedLoopAsyncTestCase
 from sioba import InterfaceContext, buffer_from_uri, DefaultValuesContext
 
 class MockInterface:
     def __init__(self, context):
         self.context = context
 
-class TestBuffers(IsolatedAsyncioTestCase):
+class TestBuffers(SharedLoopAsyncTestCase):
 
     async def test_line_buffer(self):
         """ Test the RawBuffer implementation. """
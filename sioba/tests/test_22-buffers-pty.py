@@ -1,7 +1,7 @@
-from unittest import IsolatedAsyncioTestCase
+from utils.asynccase import SharedLoopAsyncTestCase
 from sioba import InterfaceContext, buffer_from_uri
 
-class TestTerminalBuffer(IsolatedAsyncioTestCase):
+class TestTerminalBuffer(SharedLoopAsyncTestCase):
 
     def create_buffer(self, buffer_uri: str = "terminal://", **context_extra):
 
@@ -94,6 +94,29 @@ class TestTerminalBuffer(IsolatedAsyncioTestCase):
         self.assertEqual(context.cursor_row, 2)
         self.assertEqual(context.cursor_col, 6)
 
+    async def test_terminal_buffer_trailing_blanks(self):
+        """ Trailing blank cells shouldn't be dumped but styled ones should """
+        buffer = self.create_buffer()
+
+        await buffer.feed(b"Hello")
+        data = buffer.dump_screen_state()
+        self.assertIn(b"\nHello\n", data)
+        self.assertNotIn(b"Hello ", data)
+
+        # A reversed space is visible so it must be kept
+        await buffer.feed(b"\x1b[7m \x1b[0m")
+        data = buffer.dump_screen_state()
+        self.assertIn(b"Hello\x1b[7m \x1b[0m\n", data)
+
+    async def test_terminal_buffer_style_reset(self):
+        """ A styled line must not leak its style into the next line """
+        buffer = self.create_buffer()
+
+        await buffer.feed(b"\x1b[41mRED\x1b[0m\r\nplain\r\n\x1b[7mX\x1b[0m\r\nnext")
+        data = buffer.dump_screen_state()
+        self.assertIn(b"RED\x1b[0m\nplain\n", data)
+        self.assertIn(b"X\x1b[0m\nnext\n", data)
+
     async def test_terminal_buffer_resizing(self):
         pass
 
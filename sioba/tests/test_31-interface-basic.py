@@ -1,65 +1,71 @@
-from unittest import IsolatedAsyncioTestCase
+from utils.asynccase import SharedLoopAsyncTestCase
 from sioba import InterfaceContext, Interface, DefaultValuesContext
 from sioba.interface.base import InterfaceState
 import asyncio
+import os
 import rich.console
 import rich
 from utils.terminal import strip_terminal_escapes
+from utils.events import FrontendCapture, wait_for_event
 
-class TestInterfaceBase(IsolatedAsyncioTestCase):
+# Interface builds its own copy of the context with with_defaults so
+# the tests can all start from this one
+BASE_CONTEXT = DefaultValuesContext(
+    encoding="utf-8",
+    convertEol=True,
+    auto_shutdown=True,
+    scrollback_buffer_uri="terminal://",
+    title="Test Interface"
+)
 
-    async def test_interface(self):
-        # Test if we can create an InterfaceContext without errors
-        context = DefaultValuesContext(
-            encoding="utf-8",
-            convertEol=True,
-            auto_shutdown=True,
-            scrollback_buffer_uri="terminal://",
-            title="Test Interface"
-        )
+# A line that fills the default 80 column terminal, and one that has to
+# wrap once the terminal is shrunk to 20 columns
+FULL_WIDTH_STRING = b"0123456789" * 8
+LONG_STRING = b"\n\rabcdefghijklmnopqrstuvwxyz"
 
-        interface = Interface(context=context)
-        self.assertIsInstance(interface, Interface)
+class TestInterfaceBase(SharedLoopAsyncTestCase):
+
+    async def test_interface(self):
+        # Test if we can create an Interface without errors
+        interface = Interface(context=BASE_CONTEXT)
 
         # Setup the capture for the print statements
-        received_data = []
-        def receive_callback(interface, data):
-            received_data.append(data)
-        interface.on_receive_from_frontend(receive_callback)
+        received_data = FrontendCapture()
+        interface.on_receive_from_frontend(received_data)
 
         # Setup the interface for the control
-        send_data = []
-        def send_callback(interface, data):
-            send_data.append(data)
-        interface.on_send_to_frontend(send_callback)
+        send_data = FrontendCapture()
+        interface.on_send_to_frontend(send_data)
 
         #  We're initialized in this state but not running
         self.assertEqual(interface.state, InterfaceState.INITIALIZED)
 
         # Interface must be started
         await interface.start()
-        await asyncio.sleep(0.1)
         self.assertEqual(interface.state, InterfaceState.STARTED)
 
-        # Now let's inject some events
+        # Now let's inject some events, the callbacks have run by the
+        # time the call returns
         await interface.receive_from_frontend(b"Hello, World!")
 
-        # Small delay in case asyncio needs to catch up
-        await asyncio.sleep(0.1)
-
         # Check if the data was received correctly
-        self.assertEqual(len(received_data), 1)
-        self.assertEqual(received_data[0], b"Hello, World!")
+        self.assertEqual(received_data.chunks, 1)
+        self.assertEqual(received_data.buffer, b"Hello, World!")
 
         # Let's now send some data to the control
-        self.assertEqual(len(send_data), 0)  # No data sent yet
+        self.assertEqual(send_data.chunks, 0)  # No data sent yet
 
         await interface.send_to_frontend(b"CONTROL DATA!")
-        await asyncio.sleep(0.1)  # Allow time for the send to process
 
         # Check if the data was sent correctly
-        self.assertEqual(len(send_data), 1)
-        self.assertEqual(send_data[0], b"CONTROL DATA!")
+        self.assertEqual(send_data.chunks, 1)
+        self.assertEqual(send_data.buffer, b"CONTROL DATA!")
+        send_data.clear()
+
+        # Newlines get converted but existing \r\n pairs are left alone
+        await interface.send_to_frontend(b"A\nB\r\n")
+        self.assertEqual(send_data.buffer, b"A\r\nB\r\n")
+        send_data.clear()
 
         # Set the terminal title change callback
         terminal_titles = []
@@ -76,17 +82,22 @@ class TestInterfaceBase(IsolatedAsyncioTestCase):
         self.assertEqual(len(terminal_titles), 1)
         self.assertEqual(terminal_titles[0], "New Title")
 
+        # The shared context the interface was built from is untouched
+        self.assertEqual(BASE_CONTEXT.title, "Test Interface")
+
         # Check the screen state
         buffer = interface.get_terminal_buffer()
         self.assertIsNotNone(buffer)
         self.assertIn(b"CONTROL DATA!", buffer)
 
+        # The dump is reused until the screen changes
+        self.assertIs(interface.get_terminal_buffer(), buffer)
+
         # Let's make a really long string to test widths
-        full_width_string = b"0123456789" * 8
-        await interface.send_to_frontend(b"\r\n" + full_width_string)
-        await asyncio.sleep(0.1)  # Allow time for the send to process
+        await interface.send_to_frontend(b"\r\n" + FULL_WIDTH_STRING)
+        self.assertIsNot(interface.get_terminal_buffer(), buffer)
         buffer = interface.get_terminal_buffer()
-        self.assertIn(full_width_string, buffer)
+        self.assertIn(FULL_WIDTH_STRING, buffer)
 
         # Let's now change the size of the interface. This informs the underlying
         # screen state cache that we have a new terminal size. We don't have a
@@ -98,13 +109,11 @@ class TestInterfaceBase(IsolatedAsyncioTestCase):
         buffer = interface.get_terminal_buffer()
 
         # Print some text into the buffer
-        long_string = b"\n\rabcdefghijklmnopqrstuvwxyz"
-        await interface.send_to_frontend(long_string)
-        await asyncio.sleep(0.1)  # Allow time for the send to process
+        await interface.send_to_frontend(LONG_STRING)
         buffer = interface.get_terminal_buffer()
 
         # Text should wrap
-        self.assertNotIn(long_string, buffer)
+        self.assertNotIn(LONG_STRING, buffer)
         self.assertIn(b"abcdefghijklmnopqrst", buffer)
 
         # Cursor position should be checked too
@@ -123,8 +132,7 @@ class TestInterfaceBase(IsolatedAsyncioTestCase):
         # Let's see some metadata
         metadata = interface.get_terminal_metadata()
 
-        for i in range(10):
-            await interface.send_to_frontend(b"\r\n")
+        await interface.send_to_frontend(b"\r\n" * 10)
 
         # State checks
         self.assertTrue(interface.is_running())
@@ -141,29 +149,21 @@ class TestInterfaceBase(IsolatedAsyncioTestCase):
     async def test_send_frontend_disconnected_states(self):
         """ Test sending data when the frontend is not connected """
         interface = Interface(context=InterfaceContext())
-        self.assertIsInstance(interface, Interface)
 
     async def test_shutdown_interface(self):
-        # Test if we can create an InterfaceContext without errors
-        config = DefaultValuesContext(
-            encoding="utf-8",
-            convertEol=True,
-            auto_shutdown=True,
-            title="Test Interface"
-        )
-
-        interface = Interface(context=config)
-        self.assertIsInstance(interface, Interface)
+        # Test if we can create an Interface without errors
+        interface = Interface(context=BASE_CONTEXT)
 
         # Hook the shutdown callback
         shutdown_events = []
+        shutdown_event = asyncio.Event()
         async def shutdown_callback(interface: Interface):
             shutdown_events.append(True)
+            shutdown_event.set()
         interface.on_shutdown(shutdown_callback)
 
         # Interface must be started
         await interface.start()
-        await asyncio.sleep(0.1)
         self.assertEqual(interface.state, InterfaceState.STARTED)
 
         # Let's use the reference counter
@@ -177,8 +177,8 @@ class TestInterfaceBase(IsolatedAsyncioTestCase):
         # Decrement the reference count which should also trigger the shutdown
         interface.reference_decrement()
 
-        # Check if the interface can be stopped
-        await asyncio.sleep(0.1)
+        # The shutdown runs as a task so wait for it to finish
+        await wait_for_event(shutdown_event)
 
         # Check if the interface is stopped
         self.assertTrue(interface.is_shutdown())
@@ -187,20 +187,14 @@ class TestInterfaceBase(IsolatedAsyncioTestCase):
 
     async def test_interface_filehandle(self):
         """ Test the filehandle method of the interface """
-        context = DefaultValuesContext(
-            encoding="utf-8",
-            convertEol=True,
-            auto_shutdown=True,
-            scrollback_buffer_uri="terminal://",
-            title="Test Interface"
-        )
+        interface = Interface(context=BASE_CONTEXT)
 
-        interface = Interface(context=context)
-        self.assertIsInstance(interface, Interface)
+        # Filehandle writes are sent from tasks so capture what arrives
+        capture = FrontendCapture()
+        interface.on_send_to_frontend(capture)
 
         # Start the interface
         await interface.start()
-        await asyncio.sleep(0.1)
 
         # Get the filehandle
         filehandle = interface.filehandle()
@@ -209,7 +203,7 @@ class TestInterfaceBase(IsolatedAsyncioTestCase):
         # Write to the filehandle
         written_length = filehandle.write("Hello, Filehandle!")
         self.assertEqual(written_length, len("Hello, Filehandle!"))
-        await asyncio.sleep(0.1)
+        await capture.wait_for(b"Hello, Filehandle!")
 
         # Check if the data was sent to the frontend
         buffer = interface.get_terminal_buffer()
@@ -218,31 +212,34 @@ class TestInterfaceBase(IsolatedAsyncioTestCase):
         # Use the rich.Console as a way of leveraging rich to
         # write to the interface
         console = rich.console.Console(file=filehandle, force_terminal=True)
-        console.print("[blue][bold]Hello[/bold][/blue]")
-        console.print("[underline]underline[/underline]")
-        console.print("[blink]blink[/blink]")
-        console.print("[strike]strike-through[/strike]")
-        console.print("[reverse]reverse[/reverse]")
-        console.print("[italic]italic[/italic]")
-        await asyncio.sleep(0.1)
+        console.print(
+            "[blue][bold]Hello[/bold][/blue]\n"
+            "[underline]underline[/underline]\n"
+            "[blink]blink[/blink]\n"
+            "[strike]strike-through[/strike]\n"
+            "[reverse]reverse[/reverse]\n"
+            "[italic]italic[/italic]"
+        )
+        await capture.wait_for(b"italic")
 
         # Check if the data was sent to the frontend
         buffer = interface.get_terminal_buffer()
         self.assertIn(b"Hello, Filehandle!", buffer)
 
         console.print("Rich", style="bold white on blue")
-        await asyncio.sleep(0.1)
+        await capture.wait_for(b"Rich")
 
         buffer = interface.get_terminal_buffer()
 
         # Shutdown the interface
         #print(interface.buffer.screen.dump_screen_state_clean(interface.buffer.screen).decode())
 
-        print(strip_terminal_escapes(
-            data=buffer,
-            cols=interface.context.cols,
-            rows=interface.context.rows,
-        ))
+        if os.environ.get("SIOBA_TEST_VERBOSE"):
+            print(strip_terminal_escapes(
+                data=buffer,
+                cols=interface.context.cols,
+                rows=interface.context.rows,
+            ))
 
         await interface.shutdown()
 
@@ -1,4 +1,5 @@
-from unittest import IsolatedAsyncioTestCase
+from utils.asynccase import SharedLoopAsyncTestCase
+from utils.events import FrontendCapture
 from sioba import (
     interface_from_uri,
     EchoInterface,
@@ -23,7 +24,7 @@ class TestFalseInterface2(Interface):
     )
 
 
-class TestInterfaces(IsolatedAsyncioTestCase):
+class TestInterfaces(SharedLoopAsyncTestCase):
 
     async def test_available_schemes(self):
         """ Checks that the schemes we expect are available """
@@ -32,6 +33,13 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         for scheme in ["echo", "tcp", "dummy"]:
             self.assertIn(scheme, listed_schemes)
 
+        # The list is cached but registering a scheme has to show up
+        self.assertNotIn("testlisted", listed_schemes)
+        @register_scheme("testlisted")
+        class ListedInterface(Interface):
+            pass
+        self.assertIn("testlisted", list_schemes())
+
     async def test_bad_schemes(self):
         """ Checks that bad schemes raise an error  """
         with self.assertRaises(ValueError):
@@ -50,15 +58,14 @@ class TestInterfaces(IsolatedAsyncioTestCase):
 
         self.assertIsInstance(dummy, EchoInterface)
 
-        frontend_buffer = []
-        async def on_send_to_frontend(interface: Interface, data: bytes):
-            frontend_buffer.append(data)
-
-        dummy.on_send_to_frontend(on_send_to_frontend)
+        frontend_buffer = FrontendCapture()
+        dummy.on_send_to_frontend(frontend_buffer)
 
         await dummy.receive_from_frontend(b"Hello, World!")
 
-        self.assertEqual(frontend_buffer, [b"Hello, World!"])
+        # The echo has been delivered by the time receive_from_frontend returns
+        self.assertEqual(frontend_buffer.queue.get_nowait(), b"Hello, World!")
+        self.assertTrue(frontend_buffer.queue.empty())
 
         await dummy.shutdown()
 
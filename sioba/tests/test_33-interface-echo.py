@@ -1,25 +1,24 @@
-from unittest import IsolatedAsyncioTestCase
+from utils.asynccase import SharedLoopAsyncTestCase
+from utils.events import FrontendCapture
 from sioba import (
     interface_from_uri,
     EchoInterface,
-    Interface,
 )
 
-class TestInterfaces(IsolatedAsyncioTestCase):
+class TestInterfaces(SharedLoopAsyncTestCase):
 
     async def test_echo_interface(self):
         echo = await interface_from_uri("echo://").start()
 
         self.assertIsInstance(echo, EchoInterface)
 
-        frontend_buffer = []
-        async def on_send_to_frontend(interface: Interface, data: bytes):
-            frontend_buffer.append(data)
-
-        echo.on_send_to_frontend(on_send_to_frontend)
+        frontend_buffer = FrontendCapture()
+        echo.on_send_to_frontend(frontend_buffer)
 
         await echo.receive_from_frontend(b"Hello, World!")
 
-        self.assertEqual(frontend_buffer, [b"Hello, World!"])
+        # The echo has been delivered by the time receive_from_frontend returns
+        self.assertEqual(frontend_buffer.queue.get_nowait(), b"Hello, World!")
+        self.assertTrue(frontend_buffer.queue.empty())
 
         await echo.shutdown()
@@ -1,5 +1,4 @@
-from unittest import IsolatedAsyncioTestCase
-import re
+from utils.asynccase import SharedLoopAsyncTestCase
 from sioba import (
     FunctionInterface,
     Interface,
@@ -10,25 +9,25 @@ from sioba import (
 from sioba.interface.function import get_next_line, CaptureMode
 from sioba.errors import InterfaceShutdown, InterfaceNotStarted
 import asyncio
+import threading
+from utils.events import FrontendCapture
 
-class TestInterfaces(IsolatedAsyncioTestCase):
+class TestInterfaces(SharedLoopAsyncTestCase):
 
     def input_test_harness(self):
         """ Creates a input test harness for FunctionInterface """
 
-        capture_frontend_buffer = []
-        def on_send_to_frontend(interface: Interface, data: bytes):
-            capture_frontend_buffer.append(data)
+        capture_frontend_buffer = FrontendCapture()
 
-        # We test what will happen if we try to print something
-        # after the interface has been shutdown.
+        # Keep the function running while the test pokes at the
+        # interface, but let the thread go as soon as it shuts down
+        stopped = threading.Event()
         def func_code(interface: FunctionInterface):
-            import time
-            time.sleep(1)
+            stopped.wait(1)
 
-        capture_frontend_buffer.clear()
         func = FunctionInterface(func_code)
-        func.on_send_to_frontend(on_send_to_frontend)
+        func.on_send_to_frontend(capture_frontend_buffer)
+        func.on_shutdown(lambda interface: stopped.set())
 
         return capture_frontend_buffer, func
 
@@ -41,6 +40,8 @@ class TestInterfaces(IsolatedAsyncioTestCase):
             [ b'abcd\refgh',   (b'abcd', b'\n', b'efgh') ],
             [ b'abcd\x03efgh', (b'abcd', b'\x03', b'efgh') ],
             [ b'\x03efgh',     (b'', b'\x03', b'efgh') ],
+            [ b'ab\x7fcd\r',    (b'ab', b'\x7f', b'cd\r') ],
+            [ b'abcd\n',       (b'abcd\n', b'', b'') ],
         ]
         for test_input, expected_output in next_line_tests:
             next_line = get_next_line(test_input)
@@ -48,10 +49,13 @@ class TestInterfaces(IsolatedAsyncioTestCase):
 
     async def test_function_interface(self):
         caught_exceptions = []
+
+        # Holds the function after getpass until the test has checked
+        # the output
+        checked = threading.Event()
         def func_code(interface: FunctionInterface):
             try:
-                interface.print("Hello, World!")
-                interface.print("This is a simple script.")
+                interface.print("Hello, World!\nThis is a simple script.")
 
                 name = interface.input("What's your name? ")
                 interface.print(f"Hello, {name}!")
@@ -59,8 +63,7 @@ class TestInterfaces(IsolatedAsyncioTestCase):
                 hidden = interface.getpass("Enter your hidden word: ")
                 interface.print(f"Your hidden word is: {hidden}")
 
-                import time
-                time.sleep(0.2)
+                checked.wait(1)
 
                 _ = interface.input("Final message")
 
@@ -81,51 +84,81 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         )
         func = FunctionInterface(func_code, context=context)
 
-        frontend_buffer = []
-        async def on_send_to_frontend(interface: Interface, data: bytes):
-            frontend_buffer.append(data)
-        func.on_send_to_frontend(on_send_to_frontend)
+        frontend_buffer = FrontendCapture()
+        func.on_send_to_frontend(frontend_buffer)
 
         await func.start()
-        self.assertIsInstance(func, FunctionInterface)
 
-        await asyncio.sleep(0.2)
-        self.assertEqual(frontend_buffer[0], b"Hello, World!\r\n")
+        # Output queued between wakeups is coalesced into a single send
+        output = await frontend_buffer.wait_for(b"What's your name? ")
+        self.assertTrue(output.startswith(
+            b"Hello, World!\r\nThis is a simple script.\r\n"
+        ))
 
         # This will handle `input`
         await func.receive_from_frontend(b"Mochi\r\n")
-        await asyncio.sleep(0.1)
+        await frontend_buffer.wait_for(b"Hello, Mochi!")
 
         # We should see Mochi twice since we don't hide the input
         buffer = func.get_terminal_buffer()
         self.assertIn(b"your name? Mochi", buffer)
         self.assertIn(b"Hello, Mochi!", buffer)
-        self.assertEqual(
-            len(re.findall(b"Mochi", buffer)),
-            2
-        )
+        self.assertEqual(buffer.count(b"Mochi"), 2)
 
-        # Then handle `getpass`
+        # Then handle `getpass` once it has switched to hidden input
+        await frontend_buffer.wait_for(b"Enter your hidden word: ")
         await func.receive_from_frontend(b"Wasabi\r\n")
-        await asyncio.sleep(0.1)
+        await frontend_buffer.wait_for(b"Your hidden word is: Wasabi")
 
         # For getpass we only expect one showing of Wasabi
         buffer = func.get_terminal_buffer()
-        self.assertEqual(
-            len(re.findall(b"Wasabi", buffer)),
-            1
-        )
+        self.assertEqual(buffer.count(b"Wasabi"), 1)
+        checked.set()
 
         # By doing a shutdown now, we should trigger an exception within the
         # func_code that will be caught
         await func.shutdown()
-        await asyncio.sleep(0.1)
 
         with self.assertRaises(InterfaceShutdown):
             await func.receive_from_frontend(b"Final message\r\n")
 
         self.assertIn(len(caught_exceptions), [0, 1])
 
+    async def test_function_interface_coroutine(self):
+        """ Coroutine functions run on the loop and use ainput/agetpass """
+        async def func_code(interface: FunctionInterface):
+            interface.print("Hello, World!")
+
+            name = await interface.ainput("What's your name? ")
+            interface.print(f"Hello, {name}!")
+
+            hidden = await interface.agetpass("Enter your hidden word: ")
+            interface.print(f"Your hidden word is: {hidden}")
+
+            # Left waiting until the shutdown cancels it
+            await asyncio.Event().wait()
+
+        func = FunctionInterface(func_code)
+
+        frontend_buffer = FrontendCapture()
+        func.on_send_to_frontend(frontend_buffer)
+
+        await func.start()
+        self.assertIsNone(func.function_thread)
+
+        await frontend_buffer.wait_for(b"What's your name? ")
+        await func.receive_from_frontend(b"Mochi\r\n")
+        await frontend_buffer.wait_for(b"Hello, Mochi!")
+
+        await frontend_buffer.wait_for(b"Enter your hidden word: ")
+        await func.receive_from_frontend(b"Wasabi\r\n")
+        output = await frontend_buffer.wait_for(b"Your hidden word is: Wasabi")
+        self.assertEqual(output.count(b"Wasabi"), 1)
+
+        await func.shutdown()
+        await asyncio.wait_for(func.function_task, 1)
+        self.assertTrue(func.function_task.done())
+
     async def test_function_interfaceshutdown_exception(self):
         # We want to skip the InterfaceShutdown exception
         # so let's trigger that
@@ -135,9 +168,9 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         caught_exceptions = []
         def func_code2(interface: FunctionInterface):
             import time
-            for i in range(200):
+            while not interface.is_shutdown():
                 interface.print("This should trigger an exception")
-                time.sleep(0.2)
+                time.sleep(0.01)
 
         func2 = FunctionInterface(func_code2)
 
@@ -174,7 +207,9 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         # To be able to test we need to start the interface
         await func.start()
 
-        await asyncio.sleep(0.2)
+        # Let the function fail and hit the broken shutdown
+        await asyncio.to_thread(func.function_thread.join, 1)
+        self.assertFalse(func.function_thread.is_alive())
 
     async def test_function_input_capturemode_echo(self):
         """ receive_from_frontend should handle different capture modes """
@@ -190,11 +225,11 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         # Let's test the capture modes
         func.capture_mode = CaptureMode.ECHO
         await func.receive_from_frontend(b"Hello World\r\n")
-        await asyncio.sleep(0.1)
+        await capture_frontend_buffer.wait_for(b"Hello World")
 
         # In ECHO mode, the data should be echoed back to the frontend
-        self.assertEqual(len(capture_frontend_buffer), 1)
-        self.assertEqual(capture_frontend_buffer[0], b"Hello World")
+        self.assertEqual(capture_frontend_buffer.chunks, 1)
+        self.assertEqual(capture_frontend_buffer.buffer, b"Hello World")
 
         # Let's hit things with the control C
         await func.receive_from_frontend(b"\x03")
@@ -212,10 +247,11 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         # Now let's test the DISCARD
         func.capture_mode = CaptureMode.DISCARD
         await func.receive_from_frontend(b"LINE\r\n")
-        await asyncio.sleep(0.1)
 
-        # In DISCARD mode, the data should not be echoed back
-        self.assertEqual(len(capture_frontend_buffer), 0)
+        # In DISCARD mode, the data should not be echoed back. Echoes are
+        # queued as the input is handled so there's nothing to wait for
+        self.assertFalse(func.send_deque)
+        self.assertEqual(capture_frontend_buffer.chunks, 0)
 
         # Let's hit things with the control C
         await func.receive_from_frontend(b"\x03")
@@ -237,23 +273,19 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         # and it should be stored in the input buffer
         func.capture_mode = CaptureMode.INPUT
         await func.receive_from_frontend(b"CHARS")
-        await asyncio.sleep(0.1)
         self.assertEqual(func.input_buffer, b'CHARS')
 
         # Let's hit backspace to remove the last character
         await func.receive_from_frontend(b"\x7f")  # Backspace
-        await asyncio.sleep(0.1)
         self.assertEqual(func.input_buffer, b'CHAR')
 
         # When the user presses Enter, the input buffer should be cleared
         await func.receive_from_frontend(b"\r\n")
-        await asyncio.sleep(0.1)
         self.assertEqual(func.input_buffer, b'')
 
-        # Then we can get the input from the queue
-        # FIXME: this is where it's currently failing, the input_queue.sync_q is not
-        # getting the data as expected and data is == to b''
-        data = func.input_queue.sync_q.get()
+        # The line is queued by the time receive_from_frontend returns so
+        # don't block waiting on it, a regression should fail not hang
+        data = func.input_queue.sync_q.get_nowait()
         self.assertEqual(data, b'CHAR')
 
         # Let's hit things with the control C
@@ -297,7 +329,19 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         with self.assertRaises(InterfaceNotStarted):
             await func.receive_from_frontend(b"BEEP\r\n")
 
-    
+    async def test_function_print_highlighting(self):
+        """ Plain strings must still be highlighted when the console
+            has a colour system
+        """
+        from rich.console import Console
 
+        capture_frontend_buffer, func = self.input_test_harness()
+        func.console = Console(force_terminal=True, color_system="standard")
+        await func.start()
+
+        func.print("Count is 5")
 
+        output = await capture_frontend_buffer.wait_for(b"Count is ")
+        self.assertIn(b"Count is \x1b[", output)
 
+        await func.shutdown()
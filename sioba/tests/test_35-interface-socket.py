@@ -1,12 +1,14 @@
-from unittest import IsolatedAsyncioTestCase
+from utils.asynccase import SharedLoopAsyncTestCase
 import json
+import socket
+import ssl
 from sioba import (
     interface_from_uri,
     SocketInterface,
     SecureSocketInterface,
     UDPInterface,
 )
-import asyncio
+from utils.events import FrontendCapture
 from utils.server import (
     create_server,
     CERT_DIR,
@@ -15,93 +17,116 @@ from utils.server import (
     UDPServer,
 )
 
-class TestInterfaces(IsolatedAsyncioTestCase):
+class TestInterfaces(SharedLoopAsyncTestCase):
 
     servers: list[SingleRequestServer] = []
 
+    @classmethod
+    def setUpClass(cls):
+        # The SSL tests all use the same certificate so find it once
+        cls.certfile = (CERT_DIR / "future/certificate.crt").resolve()
+        cls.keyfile = (CERT_DIR / "future/private.key").resolve()
+        if not (cls.certfile.exists() and cls.keyfile.exists()):
+            raise FileNotFoundError(f"Test certificates missing from {CERT_DIR}")
+
+        super().setUpClass()
+
     def setUp(self):
         self.servers = []
 
     def tearDown(self):
         for server in self.servers:
-            server.shutdown()
-
-    async def test_plaintext_socket_interface(self):
-        # Start the test server
-        server = create_server(SingleRequestServer)
-        self.servers.append(server)
-
-        # Now connect to the test server
-        uri = f"tcp://localhost:{server.port}?convertEol=1"
-        sock = await interface_from_uri(uri).start()
-        self.assertIsInstance(sock, SocketInterface)
+            self.loop.run_until_complete(server.shutdown())
 
+    async def echo_roundtrip(self, sock):
+        """ Send a line through the interface and check the echo server's
+            reply comes back, then ask the server to stop and shut down
+        """
         # Setup the interface for the control
-        send_data = []
-        def send_callback(interface, data):
-            send_data.append(data)
-        sock.on_send_to_frontend(send_callback)
+        send_data = FrontendCapture()
+        sock.on_send_to_frontend(send_data)
 
-        # Let's connect to the plaintext server
+        # Let's connect to the server
         await sock.start()
-        await asyncio.sleep(0.1)
 
         # Send a simple request
         await sock.receive_from_frontend(b"HELLO\n")
-        await asyncio.sleep(0.1)
 
         # Check if we received a response
-        response = json.loads(send_data[0])
+        response = json.loads(await send_data.next())
         self.assertEqual(response['data'], "HELLO")
 
         # Request the server to stop
         await sock.receive_from_frontend(b"quit\n")
+        response = json.loads(await send_data.next())
+        self.assertEqual(response['data'], "quit")
 
         await sock.shutdown()
-        server.shutdown()
+
+    async def test_plaintext_socket_interface(self):
+        # Start the test server
+        server = await create_server(SingleRequestServer)
+        self.servers.append(server)
+
+        # Now connect to the test server
+        uri = (
+            f"tcp://localhost:{server.port}?convertEol=1&read_chunk_size=1024"
+            "&tcp_nodelay=0&so_rcvbuf=32768&so_sndbuf=32768"
+        )
+        sock = await interface_from_uri(uri).start()
+        self.assertIsInstance(sock, SocketInterface)
+        self.assertEqual(sock.read_chunk_size, 1024)
+        self.assertFalse(hasattr(sock.context, "__dict__"))
+
+        # asyncio turns TCP_NODELAY on by default so check that we
+        # can turn it off again
+        raw_sock = sock.transport.get_extra_info("socket")
+        self.assertFalse(raw_sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+
+        # The kernel may adjust the buffer sizes so compare against what
+        # a fresh socket reports before and after setting the same value
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+            for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+                default = probe.getsockopt(socket.SOL_SOCKET, option)
+                probe.setsockopt(socket.SOL_SOCKET, option, 32768)
+                expected = probe.getsockopt(socket.SOL_SOCKET, option)
+                self.assertNotEqual(expected, default)
+                self.assertEqual(
+                    raw_sock.getsockopt(socket.SOL_SOCKET, option),
+                    expected
+                )
+
+        await self.echo_roundtrip(sock)
+        await server.shutdown()
 
     async def test_ssl_socket_interface_fail(self):
         """ Just check that an invalid cert fails to connect """
         # Start the test server
-        certfile = CERT_DIR / "future/certificate.crt"
-        keyfile = CERT_DIR / "future/private.key"
-        self.assertTrue(certfile.exists())
-        self.assertTrue(keyfile.exists())
-
-        server = create_server(
+        server = await create_server(
             SSLSingleRequestServer,
-            certfile=certfile.resolve(),
-            keyfile=keyfile.resolve(),
+            certfile=self.certfile,
+            keyfile=self.keyfile,
         )
         self.servers.append(server)
 
-        import ssl
         with self.assertRaises(ssl.SSLCertVerificationError):
             await interface_from_uri(
                                 f"ssl://localhost:{server.port}",
                             ).start()
-            await asyncio.sleep(0.5)
 
-        server.shutdown()
+        await server.shutdown()
 
     async def test_ssl_socket_interface(self):
         """ Test connecting to a SSL socket server with certificate verification
         """
         # Start the test server
-        certfile = CERT_DIR / "future/certificate.crt"
-        keyfile = CERT_DIR / "future/private.key"
-        self.assertTrue(certfile.exists())
-        self.assertTrue(keyfile.exists())
-
-        server = create_server(
+        server = await create_server(
             SSLSingleRequestServer,
-            certfile=certfile.resolve(),
-            keyfile=keyfile.resolve(),
+            certfile=self.certfile,
+            keyfile=self.keyfile,
         )
         self.servers.append(server)
 
-
-        import ssl
         ssl_ctx = ssl._create_unverified_context()
         sslsock = await interface_from_uri(
                             f"ssl://localhost:{server.port}",
@@ -109,33 +134,12 @@ class TestInterfaces(IsolatedAsyncioTestCase):
                         ).start()
         self.assertIsInstance(sslsock, SecureSocketInterface)
 
-        # Setup the interface for the control
-        send_data = []
-        def send_callback(interface, data):
-            send_data.append(data)
-        sslsock.on_send_to_frontend(send_callback)
-
-        # Let's connect to the plaintext server
-        await sslsock.start()
-        await asyncio.sleep(0.1)
-
-        # Send a simple request
-        await sslsock.receive_from_frontend(b"HELLO\n")
-        await asyncio.sleep(0.1)
-
-        # Check if we received a response
-        response = json.loads(send_data[0])
-        self.assertEqual(response['data'], "HELLO")
-
-        # Request the server to stop
-        await sslsock.receive_from_frontend(b"quit\n")
-
-        await sslsock.shutdown()
-        server.shutdown()
+        await self.echo_roundtrip(sslsock)
+        await server.shutdown()
 
     async def test_udp_socket_interface(self):
         # Start the test server
-        server = create_server(UDPServer)
+        server = await create_server(UDPServer)
         self.servers.append(server)
 
         # Now connect to the test server
@@ -143,26 +147,5 @@ class TestInterfaces(IsolatedAsyncioTestCase):
         sock = await interface_from_uri(uri).start()
         self.assertIsInstance(sock, UDPInterface)
 
-        # Setup the interface for the control
-        send_data = []
-        def send_callback(interface, data):
-            send_data.append(data)
-        sock.on_send_to_frontend(send_callback)
-
-        # Let's connect to the plaintext server
-        await sock.start()
-        await asyncio.sleep(0.1)
-
-        # Send a simple request
-        await sock.receive_from_frontend(b"HELLO\n")
-        await asyncio.sleep(0.1)
-
-        # Check if we received a response
-        response = json.loads(send_data[0])
-        self.assertEqual(response['data'], "HELLO")
-
-        # Request the server to stop
-        await sock.receive_from_frontend(b"quit\n")
-
-        await sock.shutdown()
-        server.shutdown()
+        await self.echo_roundtrip(sock)
+        await server.shutdown()
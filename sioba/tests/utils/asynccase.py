@@ -0,0 +1,50 @@
+import asyncio
+import functools
+import inspect
+import unittest
+
+class SharedLoopAsyncTestCase(unittest.TestCase):
+    """ Like IsolatedAsyncioTestCase but all the tests in a class run on
+        one event loop rather than each building and tearing down their
+        own. Coroutine `test*` methods are run to completion on the loop.
+    """
+
+    loop: asyncio.AbstractEventLoop
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for name, method in list(vars(cls).items()):
+            if name.startswith("test") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, cls._run_on_loop(method))
+
+    @staticmethod
+    def _run_on_loop(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self.loop.run_until_complete(method(self, *args, **kwargs))
+        return wrapper
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(cls.loop)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        loop = cls.loop
+        try:
+            # Background tasks the tests left running get cancelled
+            # here rather than after each test
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+            super().tearDownClass()
@@ -0,0 +1,51 @@
+import asyncio
+
+DEFAULT_TIMEOUT = 1.0
+
+async def wait_for_event(event: asyncio.Event, timeout: float = DEFAULT_TIMEOUT) -> None:
+    """ Wait for the event to be set then clear it for the next wait """
+    await asyncio.wait_for(event.wait(), timeout)
+    event.clear()
+
+class FrontendCapture:
+    """ Collects the data an interface passes to a callback so tests can
+        wait on it arriving rather than sleeping. Register it with
+        `interface.on_send_to_frontend(capture)` (or any other callback
+        taking the interface and the data)
+    """
+
+    def __init__(self) -> None:
+        # Everything received so far in one flat buffer, and how many
+        # calls it came in
+        self.buffer = bytearray()
+        self.chunks = 0
+        self.event = asyncio.Event()
+
+        # Each send in order, for tests that consume them one at a time
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue()
+
+    def __call__(self, interface, data: bytes) -> None:
+        self.buffer += data
+        self.chunks += 1
+        self.queue.put_nowait(data)
+        self.event.set()
+
+    def clear(self) -> None:
+        self.buffer.clear()
+        self.chunks = 0
+        self.event.clear()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    async def next(self, timeout: float = DEFAULT_TIMEOUT) -> bytes:
+        """ Wait for and return the next send to the frontend """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    async def wait_for(self, expected: bytes, timeout: float = DEFAULT_TIMEOUT) -> bytes:
+        """ Wait until `expected` shows up in the captured data """
+        async def arrived():
+            while expected not in self.buffer:
+                await self.event.wait()
+                self.event.clear()
+        await asyncio.wait_for(arrived(), timeout)
+        return bytes(self.buffer)
@@ -1,12 +1,11 @@
+import asyncio
 import ssl
 import socket
 import json
+import os
 from typing import Optional
 from enum import Enum
-from threading import Thread
 import pathlib
-import os
-import random
 
 # Get the current module directory
 CERT_DIR: pathlib.Path = pathlib.Path(__file__).parent / 'certs'
@@ -18,6 +17,10 @@ class ServerStatus(Enum):
     STOPPED = 'stopped'
 
 class SingleRequestServer():
+    """ Echo server that replies to each line with a JSON status. It runs
+        on the test's own event loop so replies are delivered as soon as
+        the loop gets to them rather than from a separate thread
+    """
 
     def __init__(
             self,
@@ -26,12 +29,17 @@ class SingleRequestServer():
         ):
         self.port: int = port
         self.host: str = host
-        self.thread: Optional[Thread] = None
         self.state: ServerStatus = ServerStatus.INITIALIZED
-        self.connection: Optional[socket.socket] = None
+        self.server: Optional[asyncio.Server] = None
+        self.writers: set[asyncio.StreamWriter] = set()
 
     def create_socket(self, host: str, port: int) -> socket.socket:
         serversocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Let a rerun bind straight away even with the last run's port in
+        # TIME_WAIT. Same as asyncio, not on Windows where it would let
+        # another socket take over the port
+        if os.name == 'posix':
+            serversocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         serversocket.bind((host, port))
         return serversocket
 
@@ -40,46 +48,64 @@ class SingleRequestServer():
         self.port = serversocket.getsockname()[1]
         return serversocket
 
-    def _start(self, serversocket):
-        self.state = ServerStatus.RUNNING
-        serversocket.listen(1)
+    def create_ssl_context(self) -> Optional[ssl.SSLContext]:
+        return None
+
+    def response(self, stripped: bytes) -> bytes:
+        """ JSON reply for a message that's already had its whitespace
+            stripped
+        """
+        # The reply always has the same shape so only the data needs
+        # to go through the encoder
+        data = json.dumps(stripped.decode('utf-8', 'replace')).encode('utf-8')
+        return b'{"status": "ok", "data": ' + data + b'}'
+
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+        ):
+        self.writers.add(writer)
         try:
-            connection, _ = serversocket.accept()
-            self.connection = connection
-            while True:
-                buf = connection.recv(64)
-                if len(buf) <= 0:
-                    continue
-                if isinstance(buf, bytes):
-                    data = buf.decode('utf-8').strip()
-                connection.sendall(
-                    json.dumps({
-                        'status': 'ok',
-                        'data': data
-                    }).encode('utf-8')
-                )
-                if buf.strip() == b'quit':
-                    connection.close()
+            while buf := await reader.readline():
+                stripped = buf.strip()
+                writer.write(self.response(stripped))
+                await writer.drain()
+                if stripped == b'quit':
                     self.state = ServerStatus.STOPPED
                     break
-        except ssl.SSLEOFError:
-            print("SSL connection closed by client")
+        except (ConnectionError, ssl.SSLError):
+            print("Connection closed by client")
+        finally:
+            self.writers.discard(writer)
+            writer.close()
 
-    def start(self):
+    async def start(self):
         serversocket = self.connect(self.host, self.port)
         self.state = ServerStatus.STARTING
-        self.thread = Thread(target=self._start, args=(serversocket,), daemon=True)
-        self.thread.start()
+        self.server = await asyncio.start_server(
+            self._handle,
+            sock=serversocket,
+            ssl=self.create_ssl_context(),
+        )
+        self.state = ServerStatus.RUNNING
 
-    def shutdown(self):
-        if self.connection:
-            self.connection.close()
-            if self.thread is not None:
-                self.thread.join()
-                self.thread = None
-            self.state = ServerStatus.STOPPED
+    async def shutdown(self):
+        if self.server is None:
+            return
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        await self.server.wait_closed()
+        self.server = None
+        self.state = ServerStatus.STOPPED
 
 class SSLSingleRequestServer(SingleRequestServer):
+
+    # Parsed certificate chains shared between the tests that use the
+    # same files, keyed by (certfile, keyfile, password)
+    _ssl_contexts: dict[tuple, ssl.SSLContext] = {}
+
     def __init__(
             self,
             certfile: str,
@@ -92,17 +118,35 @@ class SSLSingleRequestServer(SingleRequestServer):
         self.keyfile: str = keyfile
         self.password: Optional[str] = password
 
-    def connect(self, host: str, port: int) -> socket.socket:
-        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-        context.load_cert_chain(
-            certfile=self.certfile,
-            keyfile=self.keyfile,
-            password=self.password,
-        )
-
-        serversocket = super().connect(host, port)
-        sslserversocket = context.wrap_socket(serversocket, server_side=True)
-        return sslserversocket
+    def create_ssl_context(self) -> Optional[ssl.SSLContext]:
+        key = (str(self.certfile), str(self.keyfile), self.password)
+        context = self._ssl_contexts.get(key)
+        if context is None:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(
+                certfile=self.certfile,
+                keyfile=self.keyfile,
+                password=self.password,
+            )
+            self._ssl_contexts[key] = context
+        return context
+
+class UDPEchoProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, server: "UDPServer"):
+        self.server = server
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        if not data:
+            return
+        stripped = data.strip()
+        self.transport.sendto(self.server.response(stripped), addr)
+        if stripped == b'quit':
+            self.server.state = ServerStatus.STOPPED
 
 class UDPServer(SingleRequestServer):
 
@@ -111,72 +155,33 @@ class UDPServer(SingleRequestServer):
             port: int = 0,
             host: str = 'localhost',
         ):
-        self.port: int = port
-        self.host: str = host
-        self.thread: Optional[Thread] = None
-        self.state: ServerStatus = ServerStatus.INITIALIZED
-        self.socket: Optional[socket.socket] = None
+        super().__init__(port=port, host=host)
+        self.transport: Optional[asyncio.DatagramTransport] = None
 
     def create_socket(self, host: str, port: int) -> socket.socket:
         serversocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         serversocket.bind((host, port))
         return serversocket
 
-    def connect(self, host: str, port: int) -> socket.socket:
-        serversocket = self.create_socket(host, port)
-        self.port = serversocket.getsockname()[1]
-        return serversocket
-
-    def _start(self, serversocket):
-        self.state = ServerStatus.RUNNING
-        try:
-            while True:
-                try:
-                    buf, addr = serversocket.recvfrom(2048)
-                except OSError as e:
-                    if getattr(e, "winerror", None) in (10038, 10022) or e.errno in (errno.EBADF,):
-                        # treat as normal shutdown
-                        return
-                    raise
-
-                if len(buf) <= 0:
-                    continue
-                if isinstance(buf, bytes):
-                    data = buf.decode('utf-8').strip()
-                # Check if server socket is still open
-                if serversocket.fileno() == -1:
-                    break
-                response = json.dumps({
-                        'status': 'ok',
-                        'data': data
-                    }).encode('utf-8')
-
-                res = serversocket.sendto(response, addr)
-                if buf.strip() == b'quit':
-                    self.state = ServerStatus.STOPPED
-                    break
-        except Exception as e:
-            print(f"UDP server error: {e} {type(e)}")
-            raise e
-        print("UDP server stopped")
-
-    def start(self):
+    async def start(self):
         serversocket = self.connect(self.host, self.port)
-        self.socket = serversocket
         self.state = ServerStatus.STARTING
-        self.thread = Thread(target=self._start, args=(serversocket,), daemon=True)
-        self.thread.start()
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: UDPEchoProtocol(self),
+            sock=serversocket,
+        )
+        self.state = ServerStatus.RUNNING
 
-    def shutdown(self):
-        if self.socket:
-            self.socket.close()
-            if self.thread is not None:
-                self.thread.join()
-                self.thread = None
-            self.state = ServerStatus.STOPPED
+    async def shutdown(self):
+        if self.transport is None:
+            return
+        self.transport.close()
+        self.transport = None
+        self.state = ServerStatus.STOPPED
 
 
-def create_server(cls, **kwargs):
+async def create_server(cls, **kwargs):
     server = cls(**kwargs)
-    server.start()
-    return server
\ No newline at end of file
+    await server.start()
+    return server
@@ -1,5 +1,15 @@
+import threading
 import pyte
 
+# SGR parameters keyed by the colour names pyte stores on each character.
+# Disable pylance error since pyte.graphics doesn't actually exist during
+# static analysis
+FG_SGR: dict[str, str] = {
+    color: str(code) for code, color in pyte.graphics.FG_ANSI.items() # type: ignore
+}
+BG_SGR: dict[str, str] = {
+    color: str(code) for code, color in pyte.graphics.BG_ANSI.items() # type: ignore
+}
 
 class EventsScreen(pyte.Screen):
 
@@ -12,43 +22,49 @@ class EventsScreen(pyte.Screen):
 
     def dump_screen_state_clean(self, screen: pyte.Screen) -> bytes:
         """ Dumps current screen state to an ANSI file without style management."""
-        buf = ""
+        parts: list[str] = []
 
         # Process scrollback buffer so we can have the history
         # Disable pylance error since pyte.graphics doesn't actually exist during
         # static analysis
         for y, line in enumerate(screen.scrollback_buffer): # type: ignore
             for x, char in line.items():
-                buf += char.data
-            buf += "\n"
+                parts.append(char.data)
+            parts.append("\n")
 
-        buf += f"             1         2         3         4         \n"
-        buf += f"   01234567890123456789012345678901234567890123456789\n"
+        parts.append(f"             1         2         3         4         \n")
+        parts.append(f"   01234567890123456789012345678901234567890123456789\n")
         # Process screen contents
         for y in range(screen.lines):
-            buf += f"{y:02}|"
+            parts.append(f"{y:02}|")
             for x in range(screen.columns):
                 char = screen.buffer[y][x]
-                buf += char.data
-            buf += "\n"
+                parts.append(char.data)
+            parts.append("\n")
 
-        return buf.encode()
+        return "".join(parts).encode("utf-8")
 
     def dump_screen_state(self, screen: pyte.Screen) -> bytes:
         """Dumps current screen state to an ANSI file with efficient style management"""
-        buf = "\033[0m"  # Initial reset
+        parts: list[str] = ["\033[0m"]  # Initial reset
 
         # Track current attributes
-        current_state = {
-            'bold': False,
-            'italics': False,
-            'underscore': False,
-            'blink': False,
-            'reverse': False,
-            'strikethrough': False,
-            'fg': 'default',
-            'bg': 'default'
-        }
+        state_keys = (
+            'bold',
+            'italics',
+            'underscore',
+            'blink',
+            'reverse',
+            'strikethrough',
+            'fg',
+            'bg',
+        )
+        default_state = (False, False, False, False, False, False, 'default', 'default')
+        current_state = default_state
+
+        # Most cells share a handful of styles so the SGR sequence for each
+        # (current state, cell style) pair is worked out once
+        sgr_cache: dict[tuple, tuple[str, tuple]] = {}
 
         def get_attribute_changes(char, current_state):
             """Determine which attributes need to change"""
@@ -101,66 +117,73 @@ class EventsScreen(pyte.Screen):
 
             # Handle colors only if they've changed
             if char.fg != current_state['fg']:
-                # Disable pylance error since pyte.graphics doesn't actually
-                # exist during static analysis
-                for code, color in pyte.graphics.FG_ANSI.items(): # type: ignore
-                    if color == char.fg:
-                        needed_attrs.append(str(code))
-                        current_state['fg'] = char.fg
-                        break
+                code = FG_SGR.get(char.fg)
+                if code is not None:
+                    needed_attrs.append(code)
+                    current_state['fg'] = char.fg
 
             if char.bg != current_state['bg']:
-                # Disable pylance error since pyte.graphics doesn't actually
-                # exist during static analysis
-                for code, color in pyte.graphics.BG_ANSI.items(): # type: ignore
-                    if color == char.bg:
-                        needed_attrs.append(str(code))
-                        current_state['bg'] = char.bg
-                        break
+                code = BG_SGR.get(char.bg)
+                if code is not None:
+                    needed_attrs.append(code)
+                    current_state['bg'] = char.bg
 
             return needed_attrs
 
+        def write_char(char, current_state):
+            """Append the char with any SGR change it needs, returns the new state"""
+            key = (
+                current_state,
+                (
+                    char.bold,
+                    char.italics,
+                    char.underscore,
+                    char.blink,
+                    char.reverse,
+                    char.strikethrough,
+                    char.fg,
+                    char.bg,
+                ),
+            )
+            cached = sgr_cache.get(key)
+            if cached is None:
+                state = dict(zip(state_keys, current_state))
+                attrs = get_attribute_changes(char, state)
+                sgr = f"\033[{';'.join(attrs)}m" if attrs else ""
+                cached = sgr_cache[key] = (sgr, tuple(state.values()))
+
+            # Write attributes if any changed
+            sgr, current_state = cached
+            if sgr:
+                parts.append(sgr)
+
+            # Write the character
+            parts.append(char.data)
+            return current_state
+
         # Process scrollback buffer so we can have the history
         # Disable pylance error since pyte.graphics doesn't actually exist during
         # static analysis
         for y, line in enumerate(screen.scrollback_buffer): # type: ignore
-            buf += "\n"
+            parts.append("\n")
             for x, char in line.items():
-                attrs = get_attribute_changes(char, current_state)
-
-                # Write attributes if any changed
-                if attrs:
-                    buf += f"\033[{';'.join(attrs)}m"
-
-                # Write the character
-                buf += char.data
+                current_state = write_char(char, current_state)
 
         # Process screen contents
         for y in range(screen.lines):
-            buf += "\n"  # Position cursor at start of line
+            parts.append("\n")  # Position cursor at start of line
 
             for x in range(screen.columns):
-                char = screen.buffer[y][x]
-                attrs = get_attribute_changes(char, current_state)
-
-                # Write attributes if any changed
-                if attrs:
-                    buf += f"\033[{';'.join(attrs)}m"
-
-                # Write the character
-                buf += char.data
+                current_state = write_char(screen.buffer[y][x], current_state)
 
             # Reset attributes at end of each line
-            buf += "\033[0m"
+            parts.append("\033[0m")
             # Reset our tracking state at end of line
-            for key in current_state:
-                current_state[key] = False
-            current_state['fg'] = 'default'
-            current_state['bg'] = 'default'
+            current_state = default_state
 
         # Reset cursor position at the end
-        buf += f"\033[{screen.lines};1H"
-        return buf.encode()
+        parts.append(f"\033[{screen.lines};1H")
+        return "".join(parts).encode("utf-8")
 
 class EventsStream(pyte.Stream):
     """
@@ -176,9 +199,19 @@ class EventsStream(pyte.Stream):
         """
         super().feed(data)
 
+# Screen reused by strip_terminal_escapes in each thread
+_strip_state = threading.local()
+
 def strip_terminal_escapes(data: bytes, cols: int=80, rows: int=24) -> str:
     """ Strip ANSI escape sequences from terminal data. """
-    screen = EventsScreen(cols, rows)
+    screen = getattr(_strip_state, "screen", None)
+    if screen is None or screen.columns != cols or screen.lines != rows:
+        screen = _strip_state.screen = EventsScreen(cols, rows)
+    else:
+        screen.reset()
+
+    # The stream is cheap, a fresh one makes sure an escape sequence cut
+    # off in the last call doesn't leak into this one
     stream = EventsStream(screen)
     stream.feed(data.decode())
     return "\n".join(screen.display)
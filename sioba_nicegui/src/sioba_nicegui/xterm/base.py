@@ -9,9 +9,9 @@ interfaces.
 Example:
     Basic usage with shell interface:
         >>> from nicegui import ui
-        >>> from sioba_nicegui.xterm import ShellXTerm
+        >>> from sioba_nicegui.xterm import XTermInterface
         >>>
-        >>> term = ShellXTerm()
+        >>> term = XTermInterface.from_uri("exec:///bin/bash")
         >>> term.classes("w-full h-full")
         >>> ui.run()
 
@@ -33,8 +33,9 @@ __all__ = [
 import json
 import asyncio
 import base64
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from datetime import datetime
+from functools import lru_cache
 from enum import Enum
 from pathlib import Path
 from typing import (
@@ -53,11 +54,27 @@ from nicegui.elements.mixins.disableable_element import DisableableElement
 from nicegui.elements.mixins.value_element import ValueElement
 from nicegui.awaitable_response import AwaitableResponse
 
+from sioba.context import UnsetType
 from sioba.errors import (
     TerminalClosedError as TerminalClosedError,
     ClientDeleted as ClientDeleted 
 )
 
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> tuple[str, ...]:
+    """ The dataclass field names of cls, fields() rebuilds the list on
+        every call so the names are only worked out once per class
+    """
+    return tuple(f.name for f in fields(cls))
+
+@lru_cache(maxsize=None)
+def _shared_field_names(cls: type, other: type) -> tuple[str, ...]:
+    """ The field names of other that cls also has, so merging an
+        interface's context doesn't check or copy its other fields
+    """
+    names = set(_field_names(cls))
+    return tuple(k for k in _field_names(other) if k in names)
+
 @dataclass
 class TerminalContext:
     rows: Optional[int] = None
@@ -106,20 +123,32 @@ class TerminalContext:
     windowsMode: Optional[bool] = None
     wordSeparator: Optional[str] = None
 
+    # dataclasses.asdict deep copies every value, these only need the
+    # field values themselves so they read the attributes directly
+
     def items(self) -> Generator[tuple[str, Any], None, None]:
         """Return all keys and values."""
-        for k, v in asdict(self).items():
-            yield (k, v)
+        for k in _field_names(type(self)):
+            yield (k, getattr(self, k))
 
     def update(self, options: "TerminalContext") -> None:
         """Update the context with another TerminalContext instance."""
-        for k, v in asdict(options).items():
-            if v is not None:
+        # Options may be an interface's context rather than a TerminalContext,
+        # only the fields we share are taken and unset ones are skipped
+        for k in _shared_field_names(type(self), type(options)):
+            v = getattr(options, k)
+            if v is not None and not isinstance(v, UnsetType):
                 setattr(self, k, v)
 
     def copy(self) -> "TerminalContext":
         """Return a copy of the context."""
-        return TerminalContext(**asdict(self))
+        data = {}
+        for k, v in self.items():
+            # Don't share the theme dict with this instance
+            if isinstance(v, dict):
+                v = v.copy()
+            data[k] = v
+        return TerminalContext(**data)
 
 CONTEXT_DEFAULTS = TerminalContext(
     rows=24,
@@ -305,12 +334,10 @@ class XTerm(
             if isinstance(data, str):
                 data = data.encode()
 
-            # Send screen update to frontend
+            # Send screen update to frontend, run_method passes the data
+            # as an argument so it's only serialized the once
             serialized_data = base64.b64encode(data).decode()
-            with self:
-                ui.run_javascript(
-                    f"runMethod({self.id}, 'refreshScreen', ['{serialized_data}']);"
-                )
+            self.run_method("refreshScreen", serialized_data)
 
             # Update cursor position
             if cursor_position := self.interface.get_terminal_cursor_position():
@@ -11,9 +11,10 @@ from sioba.errors import (
 )
 
 from datetime import datetime
+import asyncio
 import base64
 
-from nicegui import core, ui
+from nicegui import core
 from nicegui.client import Client
 import weakref
 
@@ -21,6 +22,63 @@ from sioba import interface_from_uri, Interface
 
 from loguru import logger
 
+# Output from the interface is held for up to a frame (xterm.js renders at
+# ~120fps at most) so bursts go to the browser as one write. Once this
+# much is pending it's sent straight away to keep latency bounded
+WRITE_FLUSH_DELAY = 0.008
+WRITE_FLUSH_SIZE = 64 * 1024
+
+# Typed input is gathered while the interface is busy and sent as one
+# write. A sender that gets this far ahead waits for it to be written
+INPUT_FLUSH_SIZE = 64 * 1024
+
+# DEC mode 2026 synchronized output. Terminals that support it hold off
+# rendering until the end marker so a flushed batch is painted once,
+# those that don't ignore the unknown mode
+BEGIN_SYNCHRONIZED_UPDATE = b"\x1b[?2026h"
+END_SYNCHRONIZED_UPDATE = b"\x1b[?2026l"
+
+# Escape sequences that run until a terminator: OSC, DCS, SOS, PM and APC
+STRING_SEQUENCE_INTRODUCERS = frozenset(b"]PX^_")
+
+def complete_length(data: bytes|bytearray) -> int:
+    """The length of data up to any escape sequence or UTF-8 character
+    left unfinished at the end of it.
+    """
+    end = len(data)
+
+    # Only the last escape sequence can still be waiting for the rest
+    start = data.rfind(b"\x1b")
+    if start != -1:
+        seq = data[start + 1:]
+        if not seq:
+            return start
+        kind = seq[0]
+        if kind == 0x5B:  # CSI runs to a final byte in 0x40-0x7E
+            if not any(0x40 <= b <= 0x7E for b in seq[1:]):
+                return start
+        elif kind in STRING_SEQUENCE_INTRODUCERS:
+            # Terminated by BEL or ST, an ST's own ESC would have been
+            # the one found above
+            if 0x07 not in seq:
+                return start
+        elif 0x20 <= kind <= 0x2F:  # Intermediates, eg. ESC ( B
+            if not any(0x30 <= b <= 0x7E for b in seq[1:]):
+                return start
+
+    # A multibyte character missing its continuation bytes
+    for back in range(1, min(4, end) + 1):
+        b = data[end - back]
+        if b & 0xC0 == 0x80:
+            continue
+        if b >= 0xC0:
+            needed = 2 if b < 0xE0 else 3 if b < 0xF0 else 4
+            if back < needed:
+                return end - back
+        break
+
+    return end
+
 class XTermInterface(XTerm):
     """Controller for managing XTerm instances.
 
@@ -32,11 +90,32 @@ class XTermInterface(XTerm):
             self,
             interface: Optional[Interface],
             *args,
+            sync_output: bool = True,
             **kwargs
         ) -> None:
         super().__init__(*args, **kwargs)
         self.interface = interface
 
+        # Wrap each batch of output in a synchronized update
+        self.sync_output = sync_output
+
+        # Interface output waiting to be written to the frontend
+        self.pending_writes: bytearray = bytearray()
+        self.pending_flush: Optional[asyncio.TimerHandle] = None
+
+        # Frontend input waiting to be sent to the interface
+        self.pending_input: bytearray = bytearray()
+        self.input_drain: Optional[asyncio.Task] = None
+
+        # The last screen dump sent by sync_with_frontend and its base64
+        # form, the interface returns the same dump until it changes
+        self.synced_buffer: Optional[bytes] = None
+        self.synced_buffer_b64: str = ""
+
+        # "<client id>-<socket id>" for each browser socket, render and
+        # resize events arrive often so these are only built once
+        self.client_ids: dict[str, str] = {}
+
         if interface:
             self.connect_interface(interface)
 
@@ -85,24 +164,43 @@ class XTermInterface(XTerm):
         if self.state == TerminalState.CLOSED:
             raise TerminalClosedError("Cannot connect interface to closed terminal")
 
-        self.interface = weakref.proxy(interface)
-        self.interface.reference_increment()
+        # The terminal keeps the interface alive, reference_increment and
+        # reference_decrement in _handle_delete tell it when we're done
+        self.interface = interface
+        interface.reference_increment()
+
+        # The interface can outlive this terminal so its callbacks only
+        # hold a weak reference back to us
+        xterm_ref = weakref.ref(self)
 
         # Set up interface event handlers
         async def handle_interface_send(_, data: bytes) -> None:
             """Handle data read from the interface."""
-            if self.client.id in Client.instances:
-                self.write(data)
+            xterm = xterm_ref()
+            if xterm is None or xterm.client.id not in Client.instances:
+                return
+            xterm.pending_writes += data
+            if len(xterm.pending_writes) >= WRITE_FLUSH_SIZE:
+                xterm.flush_writes()
+            elif xterm.pending_flush is None:
+                xterm.pending_flush = asyncio.get_running_loop().call_later(
+                    WRITE_FLUSH_DELAY,
+                    xterm.flush_writes,
+                )
 
         def handle_interface_exit(_) -> None:
             """Handle interface exit."""
+            xterm = xterm_ref()
+            if xterm is None:
+                return
             try:
-                self.write(b"[Interface Exited]\033[?25l\r\n")
+                xterm.flush_writes(force=True)
+                xterm.write(b"[Interface Exited]\033[?25l\r\n")
             # We risk triggering this exception as it won't be surprising
             # if someone closes their tab
             except (TerminalClosedError, ClientDeleted):
                 pass
-            self.state = TerminalState.DISCONNECTED
+            xterm.state = TerminalState.DISCONNECTED
 
         interface.on_send_to_frontend(handle_interface_send)
         interface.on_shutdown(handle_interface_exit)
@@ -111,13 +209,12 @@ class XTermInterface(XTerm):
         async def handle_client_render(e: Any) -> None:
             """Handle client render events."""
             data, sio_sid = e.args
-            client_id = f"{self.client.id}-{sio_sid}"
-            self.metadata.connected_clients.add(client_id)
+            self.metadata.connected_clients.add(self.client_id_for(sio_sid))
 
         async def handle_client_resize(e: Any) -> None:
             """Handle terminal resize events."""
             data, sio_sid = e.args
-            client_id = f"{self.client.id}-{sio_sid}"
+            client_id = self.client_id_for(sio_sid)
 
             rows = data.get("rows")
             cols = data.get("cols")
@@ -135,17 +232,27 @@ class XTermInterface(XTerm):
 
         async def handle_client_data(e: Any) -> None:
             """Handle client data input."""
-            b64_data, _ = e.args
-            if not len(b64_data):
+            text, _, *raw = e.args
+            if not len(text):
                 return
 
-            if isinstance(b64_data, str):
-
-                # data is is in base64 format
-                data = base64.b64decode(b64_data)
-
-                await interface.receive_from_frontend(data)
+            if isinstance(text, str):
+                if raw:
+                    # The frontend sends what was typed as is, the extra
+                    # argument only says it isn't base64. The encoding
+                    # is ours to pick, not something to take from it
+                    encoding = interface.context.encoding or "utf-8"
+                    data = text.encode(encoding, "replace")
+                else:
+                    # Older frontends send it in base64 format
+                    data = base64.b64decode(text)
+
+                self.pending_input += data
                 self.metadata.last_activity = datetime.now()
+                if self.input_drain is None:
+                    self.input_drain = asyncio.create_task(self.drain_input())
+                if len(self.pending_input) >= INPUT_FLUSH_SIZE:
+                    await asyncio.shield(self.input_drain)
 
         async def handle_client_mount(e: Any) -> None:
             """Invoked when a client mounts the terminal."""
@@ -173,7 +280,8 @@ class XTermInterface(XTerm):
             """Handle client disconnections."""
             logger.info(f"Client disconnected: {e}")
             # Remove disconnected client from metadata
-            client_id = f"{self.client.id}-{getattr(e, 'sid', '')}"
+            sid = getattr(e, 'sid', '')
+            client_id = self.client_ids.pop(sid, None) or f"{self.client.id}-{sid}"
             self.metadata.connected_clients.discard(client_id)
 
         self.context.update(interface.context)
@@ -181,7 +289,81 @@ class XTermInterface(XTerm):
         self.client.on_connect(handle_client_connect)
         self.client.on_disconnect(handle_client_disconnect)
 
+    def client_id_for(self, sid: str) -> str:
+        """The id used to track the browser socket sid."""
+        client_id = self.client_ids.get(sid)
+        if client_id is None:
+            client_id = self.client_ids[sid] = f"{self.client.id}-{sid}"
+        return client_id
+
+    def flush_writes(self, force: bool = False) -> None:
+        """Write any pending interface output to the frontend in one go.
+
+        With sync_output an escape sequence or character cut off at the
+        end is held back for the next flush, the end marker would land
+        in the middle of it. force sends everything regardless.
+        """
+        if self.pending_flush is not None:
+            self.pending_flush.cancel()
+            self.pending_flush = None
+
+        if not self.pending_writes:
+            return
+        if self.sync_output:
+            end = len(self.pending_writes)
+            if not force:
+                complete = complete_length(self.pending_writes)
+                # Don't hold on to something that's never going to end
+                if end - complete < WRITE_FLUSH_SIZE:
+                    end = complete
+            if not end:
+                return
+            data = (
+                BEGIN_SYNCHRONIZED_UPDATE
+                + self.pending_writes[:end]
+                + END_SYNCHRONIZED_UPDATE
+            )
+            del self.pending_writes[:end]
+        else:
+            data = bytes(self.pending_writes)
+            self.pending_writes.clear()
+
+        if self.client.id not in Client.instances:
+            return
+        try:
+            self.write(data)
+        # Nothing to report to when this runs from the timer, it's not
+        # surprising if someone has closed their tab
+        except (TerminalClosedError, ClientDeleted):
+            pass
+
+    async def drain_input(self) -> None:
+        """Send frontend input to the interface, everything that arrived
+        while the previous send was running goes in one call.
+        """
+        try:
+            while self.pending_input and self.interface:
+                data = bytes(self.pending_input)
+                self.pending_input.clear()
+                await self.interface.receive_from_frontend(data)
+        except Exception as e:
+            logger.error(f"Failed to send input to interface: {e}")
+            self.pending_input.clear()
+        finally:
+            self.input_drain = None
+
+    def discard_writes(self) -> None:
+        """Drop pending interface output, eg. when the whole screen is
+        about to be resent.
+        """
+        if self.pending_flush is not None:
+            self.pending_flush.cancel()
+            self.pending_flush = None
+        self.pending_writes.clear()
+
     def _handle_delete(self):
+        self.discard_writes()
+        self.pending_input.clear()
         if self.interface:
             self.interface.reference_decrement()
 
@@ -207,17 +389,21 @@ class XTermInterface(XTerm):
             return
 
         try:
-            # Update screen content
+            # The screen dump already includes any output still waiting
+            # to be written
+            self.discard_writes()
+
+            # Update screen content, only encoding it again if the
+            # interface has a new dump for us
             data = self.interface.get_terminal_buffer()
-            if isinstance(data, str):
-                data = data.encode()
-
-            # Send screen update to frontend
-            serialized_data = base64.b64encode(data).decode()
-            with self:
-                ui.run_javascript(
-                    f"runMethod({self.id}, 'refreshScreen', ['{serialized_data}']);"
-                )
+            if data is not self.synced_buffer:
+                encoded = data.encode() if isinstance(data, str) else data
+                self.synced_buffer_b64 = base64.b64encode(encoded).decode()
+                self.synced_buffer = data
+
+            # Send screen update to frontend, run_method passes the data
+            # as an argument so it's only serialized the once
+            self.run_method("refreshScreen", self.synced_buffer_b64)
 
             # Update cursor position
             if cursor_position := self.interface.get_terminal_cursor_position():
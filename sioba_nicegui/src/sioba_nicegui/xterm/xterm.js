@@ -1,3 +1,21 @@
+// Output arrives base64 encoded, or as raw bytes if the bridge passes
+// binary through. Either way xterm.js is handed the UTF-8 bytes so it can
+// deal with characters split across writes itself
+function toBytes(data) {
+  if (data instanceof Uint8Array) {
+    return data;
+  }
+  if (data instanceof ArrayBuffer) {
+    return new Uint8Array(data);
+  }
+  const binary = atob(data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+}
+
 export default {
   template: `<div class="p-0 m-0 bg-black"></div>`,
   props: {
@@ -23,10 +41,7 @@ export default {
       // Note: No flow control done at the moment:
       // see https://xtermjs.org/docs/guides/flowcontrol/
       if (this.term) {
-        const decoded = new TextDecoder().decode(
-          Uint8Array.from(atob(data), c => c.charCodeAt(0))
-        );
-        this.term.write(decoded);
+        this.term.write(toBytes(data));
       }
     },
     refreshScreen(data) {
@@ -112,8 +127,9 @@ export default {
     this.bufferInitialized = false;
 
     // Handle terminal input
+    // Input is sent as typed, btoa() can't handle anything outside latin-1
     this.term.onData((e) => {
-      this.$emit('data', btoa(e), socket.id);
+      this.$emit('data', e, socket.id, 'utf-8');
     });
 
     this.term.onKey((e) => {
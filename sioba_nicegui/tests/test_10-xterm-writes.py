@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from nicegui.client import Client
+
+from sioba_nicegui.xterm.interface import (
+    XTermInterface,
+    BEGIN_SYNCHRONIZED_UPDATE,
+    END_SYNCHRONIZED_UPDATE,
+    complete_length,
+)
+
+def make_xterm() -> SimpleNamespace:
+    """ Just the state flush_writes uses, without a NiceGUI client """
+    xterm = SimpleNamespace(
+        pending_writes=bytearray(),
+        pending_flush=None,
+        sync_output=True,
+        client=SimpleNamespace(id="test-client"),
+        written=[],
+    )
+    xterm.write = xterm.written.append
+    return xterm
+
+class TestXTermWrites(TestCase):
+
+    def test_complete_length(self):
+        """ Unfinished escape sequences and characters at the end are found """
+        self.assertEqual(complete_length(b"ab\x1b[3"), 2)
+        self.assertEqual(complete_length(b"ab\x1b[31mxy"), 9)
+        self.assertEqual(complete_length(b"\x1b]0;title"), 0)
+        self.assertEqual(complete_length(b"\x1b]0;title\x07"), 10)
+        self.assertEqual(complete_length("é".encode()[:1]), 0)
+        self.assertEqual(complete_length("😀".encode()), 4)
+
+    def test_flush_split_sequence(self):
+        """ A flush between b"\\x1b[3" and b"1m" keeps the sequence whole """
+        xterm = make_xterm()
+        with mock.patch.dict(Client.instances, {"test-client": None}):
+            xterm.pending_writes += b"red \x1b[3"
+            XTermInterface.flush_writes(xterm)
+            xterm.pending_writes += b"1mtext"
+            XTermInterface.flush_writes(xterm)
+
+        self.assertEqual(xterm.written, [
+            BEGIN_SYNCHRONIZED_UPDATE + b"red " + END_SYNCHRONIZED_UPDATE,
+            BEGIN_SYNCHRONIZED_UPDATE + b"\x1b[31mtext" + END_SYNCHRONIZED_UPDATE,
+        ])
+        self.assertFalse(xterm.pending_writes)
+
+    def test_flush_force(self):
+        """ force sends an unfinished tail rather than holding it """
+        xterm = make_xterm()
+        with mock.patch.dict(Client.instances, {"test-client": None}):
+            xterm.pending_writes += b"\x1b[3"
+            XTermInterface.flush_writes(xterm)
+            self.assertEqual(xterm.written, [])
+            XTermInterface.flush_writes(xterm, force=True)
+
+        self.assertEqual(xterm.written, [
+            BEGIN_SYNCHRONIZED_UPDATE + b"\x1b[3" + END_SYNCHRONIZED_UPDATE,
+        ])
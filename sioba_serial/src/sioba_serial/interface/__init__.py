@@ -9,7 +9,7 @@ from dataclasses import dataclass
 
 import serial
 
-@dataclass
+@dataclass(slots=True)
 class SerialContext(DefaultValuesContext):
     port: str|UnsetOrNone = UnsetFactory()
     baudrate: int|UnsetOrNone = UnsetFactory()
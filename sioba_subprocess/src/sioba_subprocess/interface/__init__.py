@@ -16,7 +16,7 @@ except ImportError as e:
     except ImportError as e:
         raise ImportError("No suitable subprocess interface found")
 
-@dataclass
+@dataclass(slots=True)
 class ShellContext(DefaultValuesContext):
     invoke_args: list[str] = field(default_factory=list)
     invoke_cwd: Optional[str] = None
@@ -24,7 +24,8 @@ class PosixInterface(Interface):
 
     Concurrency model:
       - subprocess.Popen to launch a child (usually a shell) attached to a PTY.
-      - Reader thread reads from master PTY and posts bytes into the asyncio loop.
+      - The master PTY is watched with loop.add_reader, reads happen on the
+        loop and a pump task sends everything read so far to the frontend.
       - Waiter thread waits for process exit and triggers shutdown.
       - Public methods remain async for compatibility with the Interface base.
     """
@@ -58,9 +59,14 @@ class PosixInterface(Interface):
         self.invoke_cwd = invoke_cwd
         self.process: Optional[subprocess.Popen] = None
 
+        # PTY output read on the loop but not yet sent to the frontend
+        self._pending_output = bytearray()
+        self._output_ready = asyncio.Event()
+        self._reading = False
+        self._pump_task: Optional[asyncio.Task] = None
+
         # threading infrastructure
         self._loop: Optional[asyncio.AbstractEventLoop] = None
-        self._reader_thread: Optional[threading.Thread] = None
         self._waiter_thread: Optional[threading.Thread] = None
         self._stop_evt = threading.Event()
         self._write_lock = threading.Lock()
@@ -107,11 +113,10 @@ class PosixInterface(Interface):
         self._stop_evt.clear()
         self._shutting_down = False
 
-        # Reader thread: pump PTY -> frontend (via the loop)
-        self._reader_thread = threading.Thread(
-            target=self._reader_loop, name=f"sioba-reader-{self.process.pid}", daemon=True
-        )
-        self._reader_thread.start()
+        # Read the PTY on the loop whenever it has output: PTY -> frontend
+        self._pump_task = asyncio.create_task(self._pump_output())
+        self._loop.add_reader(self.primary_fd, self._on_pty_readable)
+        self._reading = True
 
         # Waiter thread: detect child exit
         self._waiter_thread = threading.Thread(
@@ -123,33 +128,45 @@ class PosixInterface(Interface):
         logger.debug(f"Started process {self.process.pid} {self.invoke_command}")
         logger.warning(f"Started process {self.process.pid} {self.invoke_command}")
 
-    def _reader_loop(self):
-        """Blocking read from master PTY in a background thread."""
+    def _on_pty_readable(self):
+        """Read what's available on the master PTY, called by the loop."""
         try:
-            while not self._stop_evt.is_set():
-                try:
-                    data = os.read(self.primary_fd, READ_BUFFER_SIZE)
-                    if not data:
-                        break
-                    # Hand bytes back to the asyncio world via coroutine
-                    if self._loop and self._loop.is_running():
-                        asyncio.run_coroutine_threadsafe(
-                            self.send_to_frontend(data),
-                            self._loop
-                        )
-                except InterruptedError:
-                    continue
-                except OSError as e:
-                    # EIO on master when slave closes; EBADF if we closed master
-                    if e.errno in (errno.EIO, errno.EBADF):
-                        break
-                    logger.exception("Reader loop OSError")
-                    break
-        except Exception:
-            logger.exception("Reader loop crashed")
-        finally:
-            # Nothing else to do; loop ends on shutdown or child exit.
-            pass
+            data = os.read(self.primary_fd, READ_BUFFER_SIZE)
+        except InterruptedError:
+            return
+        except OSError as e:
+            # EIO on master when slave closes; EBADF if we closed master
+            if e.errno not in (errno.EIO, errno.EBADF):
+                logger.exception("PTY read OSError")
+            data = b""
+
+        if not data:
+            self._stop_reading()
+            return
+
+        # The pump sends everything that's built up once it gets to run
+        self._pending_output += data
+        self._output_ready.set()
+
+    def _stop_reading(self):
+        """Stop watching the master PTY. Safe to call multiple times."""
+        if self._reading:
+            self._reading = False
+            self._loop.remove_reader(self.primary_fd)
+
+    async def _pump_output(self):
+        """Send PTY output to the frontend in order, one send per wakeup."""
+        while True:
+            await self._output_ready.wait()
+            self._output_ready.clear()
+            data = bytes(self._pending_output)
+            self._pending_output.clear()
+            try:
+                await self.send_to_frontend(data)
+            except Exception:
+                if self.state == InterfaceState.STARTED:
+                    logger.exception("Error sending PTY output")
+                break
 
     def _waiter_loop(self):
         """Wait for the child to exit; trigger shutdown path back on the loop."""
@@ -235,8 +252,11 @@ class PosixInterface(Interface):
 
     async def _cleanup(self):
         """ Close threads, fds, and reset state. Safe to call multiple times. """
-        # Stop reader thread by closing master; it will see EBADF/EIO and exit.
+        # The master must come out of the selector before it's closed
         self._stop_evt.set()
+        self._stop_reading()
+        if self._pump_task is not None:
+            self._pump_task.cancel()
         try:
             try:
                 os.close(self.primary_fd)
@@ -244,8 +264,6 @@ class PosixInterface(Interface):
                 pass
 
             # Join threads (off the loop)
-            if self._reader_thread is not None:
-                await asyncio.to_thread(self._reader_thread.join, 1.0)
             if self._waiter_thread is not None:
                 await asyncio.to_thread(self._waiter_thread.join, 1.0)
 
@@ -262,7 +280,7 @@ class PosixInterface(Interface):
             except OSError:
                 pass
         finally:
-            self._reader_thread = None
+            self._pump_task = None
             self._waiter_thread = None
             self._subordinate_file = None
             self.process = None
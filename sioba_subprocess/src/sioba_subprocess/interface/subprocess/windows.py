@@ -4,6 +4,7 @@ import asyncio
 from logging import warning
 import winpty
 import threading
+import time
 import sys
 
 from typing import Callable, Optional
@@ -43,12 +44,19 @@ class WindowsInterface(Interface):
         self.invoke_args = invoke_args or []
         self.invoke_cwd = invoke_cwd
         self.process = None
-        self.main_loop = asyncio.get_event_loop()
+        self.main_loop: Optional[asyncio.AbstractEventLoop] = None
         self.on_receive_from_frontend(self._receive_from_frontend)
 
+        # Set once the process exit has been handled so that the read loop
+        # and the exit monitor don't both drive the shutdown
+        self._exited = asyncio.Event()
+
     async def start_interface(self):
         """Starts the shell process asynchronously."""
 
+        # The read thread hands output back to this loop
+        self.main_loop = asyncio.get_running_loop()
+
         # The console handle is created by winpty and used to interact with the shell
         # Spawn a subprocess connected to the PTY
         self.process = winpty.PTY(
@@ -81,13 +89,23 @@ class WindowsInterface(Interface):
                 except Exception as e:
                     logger.warning(f"PTY read error: {e}")
                     break
-                if data:
-                    asyncio.run(self.send_to_frontend(data.encode()))
+                if not data:
+                    continue
+                try:
+                    # Wait for the send so output stays in order, anything
+                    # that arrives meanwhile is picked up by the next read
+                    asyncio.run_coroutine_threadsafe(
+                        self.send_to_frontend(data.encode()),
+                        self.main_loop
+                    ).result()
+                except Exception as e:
+                    logger.warning(f"PTY send error: {e}")
+                    break
         finally:
             # PTY/process ended or read failed: trigger shutdown exactly once
             if self.main_loop and not self.main_loop.is_closed():
                 asyncio.run_coroutine_threadsafe(
-                    self.shutdown(),
+                    self._on_process_exit(),
                     self.main_loop
                 )
 
@@ -124,9 +142,22 @@ class WindowsInterface(Interface):
     async def _on_shutdown_handlers(self):
         """Monitors process exit and handles cleanup."""
         try:
-            await asyncio.to_thread(self.process.wait())  # Wait for process exit
-            self.state = InterfaceState.SHUTDOWN
-            await self.shutdown()
-            # self._on_shutdown_handlers()
+            # winpty.PTY has no wait() so poll isalive() off the event loop
+            await asyncio.to_thread(self._wait_for_exit)
         except Exception as e:
             logger.warning(f"Error monitoring process exit: {e}")
+            return
+
+        await self._on_process_exit()
+
+    def _wait_for_exit(self, interval: float = 0.5):
+        """Blocks until the process is no longer alive."""
+        while (process := self.process) and process.isalive():
+            time.sleep(interval)
+
+    async def _on_process_exit(self):
+        """Shuts down the interface exactly once when the process goes away."""
+        if self._exited.is_set():
+            return
+        self._exited.set()
+        await self.shutdown()
@@ -16,7 +16,7 @@ from typing import Sequence
 
 from loguru import logger
 
-@dataclass
+@dataclass(slots=True)
 class WebsocketContext(InterfaceContext):
 
     # Acceptable values of the Origin header, for defending against
@@ -79,7 +79,7 @@ create_connection=None
 """
 
 
-@dataclass
+@dataclass(slots=True)
 class WebsocketDefaultValuesContext(DefaultValuesContext):
 
     # The “permessage-deflate” extension is enabled by default. Set